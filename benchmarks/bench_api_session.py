@@ -0,0 +1,101 @@
+"""
+Per-move latency of Api.bots_move with the pooled keep-alive session against
+the previous behaviour (a fresh connection for every request).
+
+Run from the repository root:
+    python -m benchmarks.bench_api_session --moves 300
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from benchmarks.payloads import board_payload
+from game.api import Api
+
+
+class _LegacyApi(Api):
+    def _req(self, endpoint, method, body, operation="request"):
+        func = getattr(requests, method)
+        headers = {"Content-Type": "application/json"}
+        return func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
+
+
+def _make_handler(payload: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _reply
+        do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _measure(api: Api, moves: int):
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(moves):
+            start = time.perf_counter()
+            api.bots_move("token", "NORTH")
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(label: str, samples):
+    ordered = sorted(samples)
+    print(
+        "{:<10} mean {:7.3f} ms  p50 {:7.3f} ms  p99 {:7.3f} ms".format(
+            label,
+            statistics.mean(samples) * 1000,
+            ordered[len(ordered) // 2] * 1000,
+            ordered[int(len(ordered) * 0.99) - 1] * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--moves", type=int, default=300)
+    args = parser.parse_args()
+
+    payload = json.dumps({"data": board_payload()}).encode()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(payload))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/api".format(server.server_address[1])
+
+    try:
+        legacy = _measure(_LegacyApi(url), args.moves)
+        api = Api(url)
+        pooled = _measure(api, args.moves)
+        api.close()
+    finally:
+        server.shutdown()
+
+    _report("per-call", legacy)
+    _report("pooled", pooled)
+    print(
+        "speedup   {:.2f}x".format(statistics.mean(legacy) / statistics.mean(pooled))
+    )
+
+
+if __name__ == "__main__":
+    main()
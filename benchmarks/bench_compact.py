@@ -0,0 +1,102 @@
+"""
+Memory held per tick and decode time of CompactBoard against the dataclass
+Board, after checking the compact views match the dataclass objects.
+
+Memory is reported right after decoding and after a typical tick, once the
+views a controller asks for (bots, diamonds, teleporters) have been built.
+The second number is what a game actually holds: once the views are built
+the compact board holds more than the dataclass board, and decode+tick is
+no faster (often slower) even though decoding alone is. Times are the best
+of 5 runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_compact --iterations 50
+"""
+
+import argparse
+import timeit
+import tracemalloc
+from typing import Tuple
+
+from benchmarks.payloads import board_payload, fixture_names, load_fixture
+from decode import decode
+from game.compact import CompactBoard
+from game.models import Board, Bot, from_dict
+
+
+def _retained_bytes(build, data) -> Tuple[int, int]:
+    """
+    Bytes held by a board right after it is built, and after _tick on it
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    board = build(data)
+    decoded = tracemalloc.get_traced_memory()[0]
+    _tick(board)
+    ticked = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del board
+    return decoded - before, ticked - before
+
+
+def _tick(board):
+    # What a controller typically touches each tick
+    board.get_bot(Bot(name="bot0", email="", id=""))
+    return len(board.diamonds), len(board.bots), len(board.teleporters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = {name: load_fixture(name) for name in fixture_names()}
+    for diamonds in (200, 800):
+        payloads["100x100_{}d".format(diamonds)] = board_payload(
+            width=100, height=100, diamonds=diamonds, bots=16, teleporter_pairs=4
+        )
+
+    builders = (
+        ("dataclass", lambda d: from_dict(Board, d)),
+        ("compact", CompactBoard.from_payload),
+    )
+    for name, payload in payloads.items():
+        data = decode(payload)
+        board, compact = from_dict(Board, data), CompactBoard.from_payload(data)
+        if compact.game_objects != board.game_objects or _tick(compact) != _tick(board):
+            raise SystemExit(
+                "{}: compact views differ from dataclass board".format(name)
+            )
+
+        objects = len(data["game_objects"])
+        print("{} ({} objects)".format(name, objects))
+        tick_times = {}
+        for label, build in builders:
+            decode_time = min(
+                timeit.repeat(lambda: build(data), number=args.iterations, repeat=5)
+            )
+            tick_times[label] = min(
+                timeit.repeat(
+                    lambda: _tick(build(data)), number=args.iterations, repeat=5
+                )
+            )
+            decoded, ticked = _retained_bytes(build, data)
+            print(
+                "  {:<10} decoded {:7.1f} KiB  after tick {:7.1f} KiB "
+                "({:4.0f} B/object)".format(
+                    label, decoded / 1024, ticked / 1024, ticked / objects
+                ),
+                " decode {:8.1f} us  decode+tick {:8.1f} us".format(
+                    decode_time / args.iterations * 1e6,
+                    tick_times[label] / args.iterations * 1e6,
+                ),
+            )
+        print(
+            "  compact decode+tick takes {:.2f}x the dataclass time".format(
+                tick_times["compact"] / tick_times["dataclass"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Decision latency of BaseLogic.next_move per controller on the board fixtures.
+
+Reports mean/p50/p99 latency and the memory allocated per call, and checks
+that the optimized code paths make the same decisions as the reference ones.
+Each case is measured --repeats times, each run between two runs of a fixed
+calibration loop, and the run with the lowest p50 relative to it is kept.
+
+With --check the p50 is also compared against a baseline recorded earlier on
+the same machine (failing on regressions). Timings of a few microseconds
+swing by tens of percent between runs, so the baseline is never shared
+between machines, the comparison is relative to the calibration loop, and
+the default tolerance is wide.
+
+Run from the repository root:
+    python -m benchmarks.bench_controllers --iterations 200
+    python -m benchmarks.bench_controllers --save-baseline
+    python -m benchmarks.bench_controllers --check
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+from benchmarks.payloads import fixture_names, load_fixture
+from decode import decode
+from game import distance
+from game.compact import CompactBoard
+from game.controllers import CONTROLLERS
+from game.logic.NazarickSublogic import nazarick_targetfinder as tf
+from game.logic.NazarickSublogic.nazarick_config import BotConfig
+from game.models import Board, Bot, from_dict
+
+DEFAULT_CONTROLLERS = ["Random", "Crawler", "Nazarick"]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+PLAYER = Bot(name="bot0", email="", id="")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def calibrate(rounds: int = 20) -> float:
+    """
+    Fastest of a few runs of a fixed pure-Python loop, in microseconds: a
+    measure of how fast the machine runs right now
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        total = 0
+        for i in range(2000):
+            total += i * i % 7
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def _decide(logic: str, board: Board, seed: int) -> Tuple[int, int]:
+    # A fresh controller per call: they keep state (stuck counters, goals)
+    # that would otherwise change the decision from one iteration to the next
+    random.seed(seed)
+    controller = CONTROLLERS[logic]()
+    return controller.next_move(board.get_bot(PLAYER), board)
+
+
+def measure(
+    logic: str, board: Board, iterations: int, cold_oracle: bool = False
+) -> Dict[str, float]:
+    samples = []
+    for i in range(iterations):
+        if cold_oracle:
+            distance._ORACLES.clear()
+        random.seed(i)
+        controller = CONTROLLERS[logic]()
+        board_bot = board.get_bot(PLAYER)
+        start = time.perf_counter()
+        controller.next_move(board_bot, board)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    controller = CONTROLLERS[logic]()
+    controller.next_move(board.get_bot(PLAYER), board)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ordered = sorted(samples)
+    return {
+        "mean_us": statistics.mean(samples) * 1e6,
+        "p50_us": _percentile(ordered, 0.5) * 1e6,
+        "p99_us": _percentile(ordered, 0.99) * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def check_equivalence(name: str, data: dict) -> List[str]:
+    """
+    Optimized paths against their references, returns the mismatches found
+    """
+    problems = []
+    board = from_dict(Board, data)
+    compact = CompactBoard.from_payload(data)
+
+    for logic in CONTROLLERS:
+        for seed in range(3):
+            expected = _decide(logic, board, seed)
+            got = _decide(logic, compact, seed)
+            if tuple(got) != tuple(expected):
+                problems.append(
+                    "{} {}: CompactBoard move {} != Board move {}".format(
+                        name, logic, got, expected
+                    )
+                )
+
+    weights = BotConfig.WEIGHTS
+    for board_bot in board.bots:
+        reference = tf.find_best_actionable_target(board_bot, board, weights, None)
+        result = tf.find_best_actionable_target_pruned(board_bot, board, weights, None)
+        if result != reference:
+            problems.append(
+                "{} {}: pruned target {} != reference {}".format(
+                    name, board_bot.properties.name, result, reference
+                )
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Runs per case; the one with the lowest relative p50 is reported",
+    )
+    parser.add_argument("--controllers", nargs="+", default=DEFAULT_CONTROLLERS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--cold-oracle",
+        action="store_true",
+        help="Drop cached distance fields before every call instead of measuring "
+        "the steady state where they are reused",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run's results as the new baseline",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Fail on p50 regressions against the baseline saved on this machine",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed p50 slowdown against the baseline, relative to the "
+        "calibration loop (0.5 = 50%%)",
+    )
+    args = parser.parse_args()
+    baseline = {}
+    if args.check:
+        if not os.path.exists(args.baseline):
+            parser.error(
+                "no baseline at {}, record one on this machine with "
+                "--save-baseline first".format(args.baseline)
+            )
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, float]] = {}
+    problems: List[str] = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name in fixture_names():
+            data = decode(load_fixture(name))
+            problems.extend(check_equivalence(name, data))
+            board = from_dict(Board, data)
+            for logic in args.controllers:
+                runs = []
+                for _ in range(max(1, args.repeats)):
+                    calibration = calibrate()
+                    run = measure(logic, board, args.iterations, args.cold_oracle)
+                    run["calibration_us"] = min(calibration, calibrate())
+                    runs.append(run)
+                result = min(
+                    runs, key=lambda run: run["p50_us"] / run["calibration_us"]
+                )
+                results["{}/{}".format(logic, name)] = result
+
+    print(
+        "{:<28} {:>10} {:>10} {:>10} {:>10} {:>9}".format(
+            "case", "mean us", "p50 us", "p99 us", "peak KiB", "vs base"
+        )
+    )
+    for case, result in results.items():
+        change = "-" if baseline else ""
+        if case in baseline:
+            # p50 in calibration loops, so a machine running slower as a whole
+            # doesn't count as a regression
+            reference = baseline[case]
+            ratio = (result["p50_us"] / result["calibration_us"]) / (
+                reference["p50_us"] / reference["calibration_us"]
+            )
+            change = "{:+.0%}".format(ratio - 1)
+            if ratio > 1 + args.tolerance:
+                problems.append(
+                    "{}: p50 {:.1f} us is {} slower than the baseline".format(
+                        case, result["p50_us"], change
+                    )
+                )
+        print(
+            "{:<28} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>9}".format(
+                case,
+                result["mean_us"],
+                result["p50_us"],
+                result["p99_us"],
+                result["peak_kib"],
+                change,
+            )
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline written to {}".format(args.baseline))
+
+    for problem in problems:
+        print("FAIL " + problem, file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-payload cost of decode.decode against the previous recursive decoder,
+after checking that both produce identical output on every fixture.
+
+Run from the repository root:
+    python -m benchmarks.bench_decode --iterations 200
+"""
+import argparse
+import re
+import timeit
+
+from benchmarks.payloads import fixture_names, load_fixture
+from decode import decode
+
+
+def _reference_snake_case(value):
+    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+
+
+def _reference_decode_keys(data):
+    formatted = {}
+    for key, value in {
+        _reference_snake_case(key): value for key, value in data.items()
+    }.items():
+        if isinstance(value, dict):
+            formatted[key] = _reference_decode_keys(value)
+        elif isinstance(value, list) and len(value) > 0:
+            formatted[key] = [_reference_decode_keys(val) for val in value]
+        else:
+            formatted[key] = value
+    return formatted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for name in fixture_names():
+        payload = load_fixture(name)
+        if decode(payload) != _reference_decode_keys(payload):
+            raise SystemExit("{}: decoded output differs from reference".format(name))
+
+        reference = timeit.timeit(
+            lambda: _reference_decode_keys(payload), number=args.iterations
+        )
+        current = timeit.timeit(lambda: decode(payload), number=args.iterations)
+        print(
+            "{:<14} reference {:8.1f} us  memoized {:8.1f} us  speedup {:.2f}x".format(
+                name,
+                reference / args.iterations * 1e6,
+                current / args.iterations * 1e6,
+                reference / current,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
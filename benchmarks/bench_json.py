@@ -0,0 +1,54 @@
+"""
+Cost of parsing recorded board responses from raw bytes with every available
+JSON codec in game.api, after checking they all parse identical payloads.
+
+Run from the repository root:
+    python -m benchmarks.bench_json --iterations 200
+"""
+
+import argparse
+import json
+import timeit
+
+from benchmarks.payloads import fixture_names, load_fixture
+from game.api import ORJSON_CODEC, STDLIB_CODEC
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    codecs = [codec for codec in (STDLIB_CODEC, ORJSON_CODEC) if codec]
+    if len(codecs) == 1:
+        print("orjson is not installed, only the stdlib codec is measured")
+
+    for name in fixture_names():
+        payload = load_fixture(name)
+        # The server wraps every board in {"data": ...}
+        content = json.dumps({"data": payload}, separators=(",", ":")).encode()
+        expected = STDLIB_CODEC.loads(content)
+
+        timings = []
+        for codec in codecs:
+            if codec.loads(content) != expected:
+                raise SystemExit("{}: {} parses differently".format(name, codec.name))
+            if STDLIB_CODEC.loads(codec.dumps(expected)) != expected:
+                raise SystemExit("{}: {} encodes differently".format(name, codec.name))
+            elapsed = timeit.timeit(
+                lambda: codec.loads(content), number=args.iterations
+            )
+            timings.append((codec.name, elapsed / args.iterations * 1e6))
+
+        baseline = timings[0][1]
+        print(
+            "{:<14} {:>7} KiB  ".format(name, len(content) // 1024)
+            + "  ".join(
+                "{} {:8.1f} us ({:.2f}x)".format(codec, us, baseline / us)
+                for codec, us in timings
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cost of building a Board with the schema-compiled decoder in game.models
+against dacite.from_dict, after checking both build equal boards, and of
+diffing a tick where one bot moved against the previous one with BoardState.
+
+Run from the repository root:
+    python -m benchmarks.bench_models --iterations 50
+"""
+
+import argparse
+import copy
+import timeit
+
+import dacite
+
+from benchmarks.payloads import fixture_names, load_fixture
+from decode import decode
+from game.board_state import BoardState
+from game.models import Board, from_dict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    for name in fixture_names():
+        data = decode(load_fixture(name))
+        if from_dict(Board, data) != dacite.from_dict(Board, data):
+            raise SystemExit("{}: compiled decoder differs from dacite".format(name))
+
+        reference = timeit.timeit(
+            lambda: dacite.from_dict(Board, data), number=args.iterations
+        )
+        current = timeit.timeit(lambda: from_dict(Board, data), number=args.iterations)
+        print(
+            "{:<14} dacite {:9.1f} us  compiled {:8.1f} us  speedup {:.2f}x".format(
+                name,
+                reference / args.iterations * 1e6,
+                current / args.iterations * 1e6,
+                reference / current,
+            )
+        )
+
+        # Two alternating ticks, so every apply() sees exactly one bot move
+        ticks = [data, copy.deepcopy(data)]
+        bot = next(o for o in ticks[1]["game_objects"] if o["type"] == "BotGameObject")
+        bot["position"]["x"] = (bot["position"]["x"] + 1) % data["width"]
+        state = BoardState()
+        if state.apply(ticks[1]) != from_dict(Board, ticks[1]):
+            raise SystemExit("{}: BoardState differs from from_dict".format(name))
+        diffed = timeit.timeit(
+            lambda: state.apply(ticks[state.version % 2]), number=args.iterations
+        )
+        print(
+            "{:<14} full   {:9.1f} us  diffed   {:8.1f} us  speedup {:.2f}x".format(
+                name,
+                current / args.iterations * 1e6,
+                diffed / args.iterations * 1e6,
+                current / diffed,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
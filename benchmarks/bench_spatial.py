@@ -0,0 +1,90 @@
+"""
+Cost of the best-density and nearest-diamond queries on the board fixtures
+with game.spatial.DiamondIndex against a scan over every diamond, after
+checking both give the same answers from every bot on the board.
+
+Run from the repository root:
+    python -m benchmarks.bench_spatial --iterations 200
+"""
+
+import argparse
+import timeit
+
+from benchmarks.payloads import fixture_names, load_fixture
+from decode import decode
+from game.models import Board, from_dict
+from game.spatial import DiamondIndex
+
+
+def _steps(a, b) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def scan_best_density(diamonds, origin):
+    best_density, best = 0.0, None
+    for obj in diamonds:
+        steps = _steps(origin, obj.position)
+        density = obj.properties.points / steps if steps else float("inf")
+        if density > best_density:
+            best_density, best = density, obj
+    return best_density, best
+
+
+def scan_nearest(diamonds, origin, k):
+    ranked = sorted(
+        range(len(diamonds)), key=lambda i: (_steps(origin, diamonds[i].position), i)
+    )
+    return [diamonds[i] for i in ranked[:k]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    for name in fixture_names():
+        board = from_dict(Board, decode(load_fixture(name)))
+        diamonds = board.diamonds
+        origins = [bot.position for bot in board.bots]
+        index = DiamondIndex(diamonds)
+        for origin in origins:
+            if index.best_density(origin) != scan_best_density(diamonds, origin):
+                raise SystemExit("{}: best_density differs from a scan".format(name))
+            if index.nearest(origin, args.k) != scan_nearest(diamonds, origin, args.k):
+                raise SystemExit("{}: nearest differs from a scan".format(name))
+
+        cases = [
+            (
+                "density",
+                lambda: [scan_best_density(diamonds, o) for o in origins],
+                lambda: [index.best_density(o) for o in origins],
+            ),
+            (
+                "nearest",
+                lambda: [scan_nearest(diamonds, o, args.k) for o in origins],
+                lambda: [index.nearest(o, args.k) for o in origins],
+            ),
+        ]
+        build = timeit.timeit(lambda: DiamondIndex(diamonds), number=args.iterations)
+        print(
+            "{:<14} {} diamonds, index built in {:.1f} us".format(
+                name, len(diamonds), build / args.iterations * 1e6
+            )
+        )
+        for case, scan, indexed in cases:
+            reference = timeit.timeit(scan, number=args.iterations)
+            current = timeit.timeit(indexed, number=args.iterations)
+            print(
+                "{:<14} {:<8} scan {:9.1f} us  index {:8.1f} us  speedup {:.2f}x".format(
+                    name,
+                    case,
+                    reference / args.iterations / len(origins) * 1e6,
+                    current / args.iterations / len(origins) * 1e6,
+                    reference / current,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
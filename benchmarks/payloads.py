@@ -0,0 +1,159 @@
+"""
+Synthetic board payloads in the server's wire format. The JSON fixtures under
+benchmarks/fixtures are produced by running `python -m benchmarks.payloads`.
+"""
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+
+def board_payload(
+    width: int = 15,
+    height: int = 15,
+    diamonds: int = 20,
+    bots: int = 4,
+    teleporter_pairs: int = 1,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Build a board payload shaped like the one the server sends (camelCase keys)
+    :param width: board width
+    :param height: board height
+    :param diamonds: number of diamonds on the board
+    :param bots: number of bots (each with its own base)
+    :param teleporter_pairs: number of teleporter pairs
+    :param seed: random seed, so every run sees the same board
+    :return: dict
+    """
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(width) for y in range(height)]
+    rng.shuffle(cells)
+    free = iter(cells)
+    next_id = iter(range(1, len(cells) + 1))
+
+    def position():
+        x, y = next(free)
+        return {"x": x, "y": y}
+
+    game_objects: List[Dict[str, Any]] = []
+    for i in range(bots):
+        base = position()
+        name = "bot{}".format(i)
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": position(),
+                "type": "BotGameObject",
+                "properties": {
+                    "diamonds": rng.randint(0, 5),
+                    "score": rng.randint(0, 30),
+                    "name": name,
+                    "inventorySize": 5,
+                    "canTackle": True,
+                    "millisecondsLeft": rng.randint(1000, 60000),
+                    "timeJoined": "2025-05-17T11:46:25.422Z",
+                    "base": base,
+                },
+            }
+        )
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": dict(base),
+                "type": "BaseGameObject",
+                "properties": {"name": name},
+            }
+        )
+    for _ in range(teleporter_pairs):
+        first, second = next(next_id), next(next_id)
+        game_objects.append(
+            {
+                "id": first,
+                "position": position(),
+                "type": "TeleportGameObject",
+                "properties": {"pairId": str(second)},
+            }
+        )
+        game_objects.append(
+            {
+                "id": second,
+                "position": position(),
+                "type": "TeleportGameObject",
+                "properties": {"pairId": str(first)},
+            }
+        )
+    game_objects.append(
+        {
+            "id": next(next_id),
+            "position": position(),
+            "type": "DiamondButtonGameObject",
+            "properties": {},
+        }
+    )
+    for _ in range(diamonds):
+        game_objects.append(
+            {
+                "id": next(next_id),
+                "position": position(),
+                "type": "DiamondGameObject",
+                "properties": {"points": 2 if rng.random() < 0.2 else 1},
+            }
+        )
+
+    return {
+        "id": 1,
+        "width": width,
+        "height": height,
+        "minimumDelayBetweenMoves": 100,
+        "features": [
+            {"name": "DiamondButtonProvider", "config": None},
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": 0.2,
+                },
+            },
+            {"name": "TeleportProvider", "config": {"pairs": teleporter_pairs}},
+            {"name": "BotProvider", "config": {"inventorySize": 5, "canTackle": True}},
+            {"name": "TeleportRelocationProvider", "config": {"seconds": 10}},
+        ],
+        "gameObjects": game_objects,
+    }
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURES = {
+    "board_15x15": dict(width=15, height=15, diamonds=20, bots=4, seed=1),
+    "board_50x50": dict(width=50, height=50, diamonds=150, bots=8, seed=2),
+    "board_100x100": dict(
+        width=100, height=100, diamonds=500, bots=16, teleporter_pairs=4, seed=3
+    ),
+}
+
+
+def load_fixture(name: str) -> Dict[str, Any]:
+    """
+    Load a board payload saved under benchmarks/fixtures
+    :param name: fixture name without extension
+    :return: dict
+    """
+    with open(os.path.join(FIXTURES_DIR, name + ".json")) as f:
+        return json.load(f)
+
+
+def fixture_names() -> List[str]:
+    return sorted(
+        name[: -len(".json")]
+        for name in os.listdir(FIXTURES_DIR)
+        if name.endswith(".json")
+    )
+
+
+if __name__ == "__main__":
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, options in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, name + ".json"), "w") as f:
+            json.dump(board_payload(**options), f, separators=(",", ":"))
@@ -1,4 +1,9 @@
 import re
+from functools import lru_cache
+
+# The server only ever sends a few dozen distinct keys, so this comfortably
+# holds all of them while still bounding memory if something odd shows up.
+KEY_CACHE_SIZE = 1024
 
 
 def _unpack(data):
@@ -7,6 +12,7 @@ def _unpack(data):
     return data
 
 
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def _snake_case(value):
     """
     Convert camel case string to snake case
@@ -17,31 +23,34 @@ def _snake_case(value):
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
 
 
-def _keys_to_snake_case(content):
-    """
-    Convert all keys for given dict to snake case
-    :param content: dict
-    :return: dict
-    """
-    return {_snake_case(key): value for key, value in content.items()}
-
-
 def decode_keys(data):
     """
-    Convert all keys for given dict/list to snake case recursively
+    Convert all keys for given dict/list to snake case, walking nested
+    dicts and lists iteratively. Lists of scalars are copied as they are.
     :param data: dict
     :return: dict
     """
     formatted = {}
-    for key, value in _unpack(_keys_to_snake_case(data)):
-        if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
-        elif isinstance(value, list) and len(value) > 0:
-            formatted[key] = []
-            for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
-        else:
-            formatted[key] = value
+    pending = [(data, formatted)]
+    while pending:
+        source, target = pending.pop()
+        for key, value in _unpack(source):
+            key = _snake_case(key)
+            if isinstance(value, dict):
+                target[key] = {}
+                pending.append((value, target[key]))
+            elif isinstance(value, list) and len(value) > 0:
+                items = []
+                for val in value:
+                    if isinstance(val, dict):
+                        item = {}
+                        pending.append((val, item))
+                        items.append(item)
+                    else:
+                        items.append(val)
+                target[key] = items
+            else:
+                target[key] = value
     return formatted
 
 
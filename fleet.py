@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+
+from colorama import Fore, Style, init
+from game.api import DEFAULT_POOL_SIZE
+from game.async_api import AsyncApi
+from game.board_feed import BoardFeed, BoardSnapshot
+from game.bot_handler import BotHandler
+from game.controllers import CONTROLLERS
+from game.log import DEFAULT_LEVEL, get_logger, parse_sampling, setup_logging
+from game.logic.base import BaseLogic
+from game.models import Bot
+from game.request_policy import DEFAULT_READ_TIMEOUT, RequestPolicy, default_policy
+from game.timing import MovePacer
+
+init()
+BASE_URL = "http://localhost:3000/api"
+DEFAULT_BOARD_ID = 1
+DEFAULT_MANIFEST = "bots.json"
+# Failed board fetches in a row after which a bot gives up
+MAX_FAILED_REQUESTS = 10
+
+_moves_log = get_logger("moves")
+_http_log = get_logger("http")
+
+
+@dataclass
+class FleetEntry:
+    name: str
+    email: str
+    logic: str
+    team: str
+    password: str = "123456"
+    token: Optional[str] = None
+
+
+def load_manifest(path: str) -> List[FleetEntry]:
+    with open(path) as f:
+        entries = [FleetEntry(**entry) for entry in json.load(f)]
+    for entry in entries:
+        if entry.logic not in CONTROLLERS:
+            raise ValueError(
+                "Invalid logic controller for {}: {}".format(entry.name, entry.logic)
+            )
+    return entries
+
+
+def _error(name: str, message: str) -> None:
+    print(
+        Fore.RED
+        + Style.BRIGHT
+        + "Error: "
+        + Style.RESET_ALL
+        + "[{}] {}".format(name, message)
+    )
+
+
+async def setup_bot(api: AsyncApi, entry: FleetEntry, board_id: int) -> Optional[Bot]:
+    """
+    Recover (or register) the bot, then join it to the board
+    """
+    token = entry.token
+    if not token:
+        token = await api.bots_recover(entry.email, entry.password)
+    if not token:
+        registered = await api.bots_register(
+            entry.name, entry.email, entry.password, entry.team
+        )
+        if not registered:
+            _error(entry.name, "Unable to register bot")
+            return None
+        token = registered.id
+
+    bot = await api.bots_get(token)
+    if not bot or not bot.name:
+        _error(entry.name, "Bot does not exist")
+        return None
+    if not await api.bots_join(bot.id, board_id):
+        _error(entry.name, "Unable to join board {}".format(board_id))
+        return None
+    print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+    return bot
+
+
+async def fetch_snapshot(
+    feed: BoardFeed, name: str, retry_delay: float, newer_than: int = 0
+) -> Optional[BoardSnapshot]:
+    """
+    Board newer than newer_than; failed fetches are retried every retry_delay
+    seconds until MAX_FAILED_REQUESTS in a row, then None is returned
+    """
+    failed = 0
+    while True:
+        try:
+            return await feed.latest(newer_than)
+        except Exception as e:
+            failed += 1
+            _http_log.warning(
+                "[%s] Board fetch failed (%d in a row): %r", name, failed, e
+            )
+            if failed >= MAX_FAILED_REQUESTS:
+                return None
+            await asyncio.sleep(retry_delay)
+
+
+async def play(
+    api: AsyncApi, feed: BoardFeed, bot: Bot, bot_logic: BaseLogic, time_factor: float
+) -> None:
+    snapshot = await fetch_snapshot(feed, bot.name, feed.max_age)
+    if not snapshot:
+        return
+    board, version = snapshot.board, snapshot.version
+    pacer = MovePacer(board.minimum_delay_between_moves / 1000, time_factor)
+
+    while True:
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            break
+
+        delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            _moves_log.warning(
+                "[%s] Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+                bot.name,
+                delta_x,
+                delta_y,
+                board_bot.position.x,
+                board_bot.position.y,
+            )
+            await asyncio.sleep(pacer.interval)
+            snapshot = await fetch_snapshot(feed, bot.name, pacer.interval, version)
+            if not snapshot:
+                break
+            board, version = snapshot.board, snapshot.version
+            continue
+
+        # Don't spam the board more than it allows!
+        await asyncio.sleep(pacer.remaining())
+        try:
+            pacer.sent()
+            moved = await api.bots_move(
+                bot.id, BotHandler._get_direction(delta_x, delta_y)
+            )
+        except Exception as e:
+            # A timed out or failed move is not fatal, the board tells what
+            # happened
+            _http_log.warning("[%s] Move failed: %r", bot.name, e)
+            moved = None
+        # Our own move response is the freshest board, and the other bots
+        # get it too
+        if moved:
+            snapshot = feed.publish(moved)
+        else:
+            snapshot = await fetch_snapshot(feed, bot.name, pacer.interval, version)
+        if not snapshot:
+            break
+        board, version = snapshot.board, snapshot.version
+
+    print(
+        Fore.BLUE + Style.BRIGHT + "Game over! " + Style.RESET_ALL + bot.name,
+        pacer.summary(),
+    )
+
+
+async def run_fleet(
+    entries: List[FleetEntry],
+    host: str,
+    board_id: int,
+    time_factor: float,
+    pool_size: int,
+    policy: Optional[RequestPolicy] = None,
+) -> None:
+    api = AsyncApi(host, pool_size=pool_size, policy=policy or default_policy())
+    async with api:
+        # One bot failing, at setup or during the game, leaves the others playing
+        bots = await asyncio.gather(
+            *(setup_bot(api, entry, board_id) for entry in entries),
+            return_exceptions=True,
+        )
+        for entry, bot in zip(entries, bots):
+            if isinstance(bot, Exception):
+                _error(entry.name, "Setup failed: {!r}".format(bot))
+        playing = [
+            (entry, bot) for entry, bot in zip(entries, bots) if isinstance(bot, Bot)
+        ]
+        feed = BoardFeed(api, board_id)
+        first = await fetch_snapshot(feed, "fleet", 1.0)
+        if not first:
+            return
+        # A snapshot stays current for one move slot
+        feed.max_age = first.board.minimum_delay_between_moves / 1000 * time_factor
+        results = await asyncio.gather(
+            *(
+                play(api, feed, bot, CONTROLLERS[entry.logic](), time_factor)
+                for entry, bot in playing
+            ),
+            return_exceptions=True,
+        )
+        for (entry, _), result in zip(playing, results):
+            if isinstance(result, Exception):
+                _error(entry.name, "Stopped playing: {!r}".format(result))
+        print(feed.summary())
+        print(api.stats.summary())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a fleet of Diamonds bots in a single process"
+    )
+    parser.add_argument(
+        "--manifest",
+        default=DEFAULT_MANIFEST,
+        help="JSON list of bots ({{name, email, password, logic, team}}). Default: {}".format(
+            DEFAULT_MANIFEST
+        ),
+    )
+    parser.add_argument(
+        "--board", default=DEFAULT_BOARD_ID, help="Id of the board to join"
+    )
+    parser.add_argument(
+        "--time-factor",
+        default=1,
+        help="A factor to multiply each move delay with",
+    )
+    parser.add_argument("--host", default=BASE_URL, help="Default: {}".format(BASE_URL))
+    parser.add_argument(
+        "--request-timeout",
+        default=DEFAULT_READ_TIMEOUT,
+        help="Seconds to wait for a response before retrying or giving up. Default: {}".format(
+            DEFAULT_READ_TIMEOUT
+        ),
+    )
+    parser.add_argument(
+        "--hedge-after",
+        help="Send a second board request when the first has not answered after this many milliseconds",
+    )
+    parser.add_argument(
+        "--pool-size",
+        default=DEFAULT_POOL_SIZE,
+        help="Connections shared by the whole fleet. Default: {}".format(
+            DEFAULT_POOL_SIZE
+        ),
+    )
+    parser.add_argument(
+        "--log-level",
+        default=DEFAULT_LEVEL,
+        help="DEBUG, INFO, WARNING or ERROR. Default: {}".format(DEFAULT_LEVEL),
+    )
+    parser.add_argument(
+        "--log-sample",
+        help="Keep one record in every N per log category, e.g. http=10,moves=100",
+    )
+    args = parser.parse_args()
+    setup_logging(args.log_level, parse_sampling(args.log_sample))
+
+    asyncio.run(
+        run_fleet(
+            load_manifest(args.manifest),
+            args.host,
+            int(args.board),
+            float(args.time_factor),
+            int(args.pool_size),
+            default_policy(
+                float(args.request_timeout),
+                float(args.hedge_after) / 1000 if args.hedge_after else None,
+            ),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
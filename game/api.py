@@ -1,41 +1,188 @@
 import json
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import wait
+from dataclasses import dataclass, field
+from time import sleep
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import requests
+from requests.adapters import HTTPAdapter
 from colorama import Back, Fore, Style, init
-from dacite import from_dict
 from decode import decode
-from game.models import Board, Bot
+from game.board_state import BoardState
+from game.compact import CompactBoard
+from game.models import Board, Bot, from_dict
+from game.log import get_logger
+from game.request_policy import (
+    EndpointPolicy,
+    RequestPolicy,
+    RequestStats,
+    default_policy,
+)
+from game.timing import TIMINGS
 from requests import Response
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_HEADERS = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+_http_log = get_logger("http")
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    """
+    How request bodies are encoded and responses decoded, bytes in and out
+    """
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+STDLIB_CODEC = JsonCodec("json", _stdlib_dumps, json.loads)
+ORJSON_CODEC = JsonCodec("orjson", orjson.dumps, orjson.loads) if orjson else None
+# orjson parses boards several times faster; the stdlib is the fallback
+DEFAULT_CODEC = ORJSON_CODEC or STDLIB_CODEC
+
 
 @dataclass
 class Api:
     url: str
+    pool_size: int = DEFAULT_POOL_SIZE
+    compact_boards: bool = False
+    incremental_boards: bool = False
+    session: Optional[requests.Session] = field(default=None, repr=False)
+    board_state: BoardState = field(default_factory=BoardState, repr=False)
+    policy: RequestPolicy = field(default_factory=default_policy)
+    codec: JsonCodec = DEFAULT_CODEC
+    stats: RequestStats = field(default_factory=RequestStats, repr=False)
+    _hedges: Optional[ThreadPoolExecutor] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        # One keep-alive session per Api, shared by every handler built on it,
+        # so moves and board fetches reuse the same TCP connections.
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_size, pool_maxsize=self.pool_size
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+    def close(self):
+        if self._hedges is not None:
+            self._hedges.shutdown(wait=False)
+        self.session.close()
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
-    def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
-            )
+    def _board(self, data: dict, incremental: bool = True) -> Board:
+        """
+        :param incremental: diff against the previous tick when incremental_boards
+        is on; only for the board being played, as board_state holds one board
+        """
+        with TIMINGS.span("model"):
+            if self.compact_boards:
+                return CompactBoard.from_payload(data)
+            if self.incremental_boards and incremental:
+                return self.board_state.apply(data)
+            return from_dict(Board, data)
+
+    def _send(self, method: str, url: str, data: bytes, policy: EndpointPolicy):
+        return self.session.request(method, url, data=data, timeout=policy.timeout)
+
+    def _send_hedged(
+        self, method: str, url: str, data: bytes, policy: EndpointPolicy, operation: str
+    ) -> Response:
+        if self._hedges is None:
+            self._hedges = ThreadPoolExecutor(max_workers=4)
+        first = self._hedges.submit(self._send, method, url, data, policy)
+        try:
+            return first.result(timeout=policy.hedge_after)
+        except FutureTimeout:
+            pass
+
+        self.stats.count(operation, "hedged")
+        second = self._hedges.submit(self._send, method, url, data, policy)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self.stats.count(operation, "hedge_won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _req(
+        self, endpoint: str, method: str, body: dict, operation: str = "request"
+    ) -> Response:
+        method = method.upper()
+        url = self._get_url(endpoint)
+        data = self.codec.dumps(body)
+        policy = self.policy.for_operation(operation)
+        hedged = method == "GET" and policy.hedge_after is not None
+        # Only GETs are safe to send twice
+        attempts = 1 + (policy.retries if method == "GET" else 0)
+        _http_log.info(
+            ">>> %s %s %s",
+            Style.BRIGHT + method + Style.RESET_ALL,
+            Fore.GREEN + endpoint + Style.RESET_ALL,
+            body,
         )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
+
+        for attempt in range(attempts):
+            if attempt:
+                self.stats.count(operation, "retried")
+                sleep(policy.backoff_delay(attempt - 1))
+            last_attempt = attempt == attempts - 1
+            try:
+                with TIMINGS.span("http"):
+                    if hedged:
+                        res = self._send_hedged(method, url, data, policy, operation)
+                    else:
+                        res = self._send(method, url, data, policy)
+            except requests.Timeout:
+                self.stats.count(operation, "timeout")
+                if last_attempt:
+                    raise
+                continue
+            except requests.ConnectionError:
+                self.stats.count(operation, "error")
+                if last_attempt:
+                    raise
+                continue
+
+            self.stats.count(
+                operation,
+                "ok" if res.status_code < 400 else "status_{}".format(res.status_code),
+            )
+            if res.status_code >= 500 and not last_attempt:
+                continue
+            break
+
         if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+            _http_log.info("<<< %s OK", res.status_code)
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            _http_log.warning("<<< %s %s", res.status_code, res.text)
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
-        response = self._req("/bots/{}".format(bot_token), "get", {})
+        response = self._req("/bots/{}".format(bot_token), "get", {}, "bots_get")
         data, status = self._return_response_and_status(response)
         if status == 200:
             return from_dict(Bot, data)
@@ -48,6 +195,7 @@ class Api:
             "/bots",
             "post",
             {"email": email, "name": name, "password": password, "team": team},
+            "bots_register",
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
@@ -55,15 +203,19 @@ class Api:
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
-        response = self._req("/boards", "get", {})
+        response = self._req("/boards", "get", {}, "boards_list")
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            # Every board of the server, not ticks of the one being played
+            return [self._board(board, incremental=False) for board in resp]
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
         response = self._req(
-            f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
+            f"/bots/{bot_token}/join",
+            "post",
+            {"preferredBoardId": board_id},
+            "bots_join",
         )
 
         resp, status = self._return_response_and_status(response)
@@ -72,10 +224,10 @@ class Api:
         return False
 
     def boards_get(self, board_id: str) -> Optional[Board]:
-        response = self._req("/boards/{}".format(board_id), "get", {})
+        response = self._req("/boards/{}".format(board_id), "get", {}, "boards_get")
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._board(resp)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
@@ -83,16 +235,20 @@ class Api:
             "/bots/{}/move".format(bot_token),
             "post",
             {"direction": direction},
+            "bots_move",
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._board(resp)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
         try:
             response = self._req(
-                "/bots/recover", "post", {"email": email, "password": password}
+                "/bots/recover",
+                "post",
+                {"email": email, "password": password},
+                "bots_recover",
             )
             resp, status = self._return_response_and_status(response)
             if status == 201:
@@ -104,10 +260,17 @@ class Api:
     def _return_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
+        with TIMINGS.span("json"):
+            # Straight from the body bytes, skipping the str round trip
+            payload = self.codec.loads(response.content)
+        with TIMINGS.span("decode"):
+            data = unwrap_response(payload)
+        return data, response.status_code
+
 
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
+def unwrap_response(resp: Union[dict, List]) -> Union[dict, List]:
+    response_data = resp.get("data") if isinstance(resp, dict) else resp
+    if not response_data:
+        response_data = resp
 
-        return decode(response_data), response.status_code
+    return decode(response_data)
@@ -0,0 +1,215 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+import aiohttp
+from colorama import Fore, Style
+from game.api import (
+    DEFAULT_CODEC,
+    DEFAULT_HEADERS,
+    DEFAULT_POOL_SIZE,
+    JsonCodec,
+    unwrap_response,
+)
+from game.log import get_logger
+from game.models import Board, Bot, from_dict
+from game.request_policy import (
+    EndpointPolicy,
+    RequestPolicy,
+    RequestStats,
+    default_policy,
+)
+
+_http_log = get_logger("http")
+
+
+@dataclass
+class AsyncApi:
+    """
+    asyncio counterpart of Api. A single instance (and its connection pool) is
+    meant to be shared by every bot running in the process.
+    """
+
+    url: str
+    pool_size: int = DEFAULT_POOL_SIZE
+    session: Optional[aiohttp.ClientSession] = field(default=None, repr=False)
+    policy: RequestPolicy = field(default_factory=default_policy)
+    codec: JsonCodec = DEFAULT_CODEC
+    stats: RequestStats = field(default_factory=RequestStats, repr=False)
+
+    async def __aenter__(self) -> "AsyncApi":
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=self._timeout(self.policy.default),
+            )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_url(self, endpoint: str) -> str:
+        return "{}{}".format(self.url, endpoint)
+
+    @staticmethod
+    def _timeout(policy: EndpointPolicy) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            sock_connect=policy.connect_timeout, sock_read=policy.read_timeout
+        )
+
+    async def _send(
+        self, method: str, url: str, data: bytes, policy: EndpointPolicy
+    ) -> Tuple[bytes, int]:
+        async with self.session.request(
+            method, url, data=data, timeout=self._timeout(policy)
+        ) as res:
+            return await res.read(), res.status
+
+    async def _send_hedged(
+        self, method: str, url: str, data: bytes, policy: EndpointPolicy, operation: str
+    ) -> Tuple[bytes, int]:
+        first = asyncio.ensure_future(self._send(method, url, data, policy))
+        done, _ = await asyncio.wait({first}, timeout=policy.hedge_after)
+        if done:
+            return first.result()
+
+        self.stats.count(operation, "hedged")
+        second = asyncio.ensure_future(self._send(method, url, data, policy))
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is second:
+                        self.stats.count(operation, "hedge_won")
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def _req(
+        self, endpoint: str, method: str, body: dict, operation: str = "request"
+    ) -> Tuple[Union[dict, List], int]:
+        method = method.upper()
+        url = self._get_url(endpoint)
+        data = self.codec.dumps(body)
+        policy = self.policy.for_operation(operation)
+        hedged = method == "GET" and policy.hedge_after is not None
+        # Only GETs are safe to send twice
+        attempts = 1 + (policy.retries if method == "GET" else 0)
+        _http_log.info(
+            ">>> %s %s %s",
+            Style.BRIGHT + method + Style.RESET_ALL,
+            Fore.GREEN + endpoint + Style.RESET_ALL,
+            body,
+        )
+
+        for attempt in range(attempts):
+            if attempt:
+                self.stats.count(operation, "retried")
+                await asyncio.sleep(policy.backoff_delay(attempt - 1))
+            last_attempt = attempt == attempts - 1
+            try:
+                if hedged:
+                    content, status = await self._send_hedged(
+                        method, url, data, policy, operation
+                    )
+                else:
+                    content, status = await self._send(method, url, data, policy)
+            except asyncio.TimeoutError:
+                self.stats.count(operation, "timeout")
+                if last_attempt:
+                    raise
+                continue
+            except aiohttp.ClientConnectionError:
+                self.stats.count(operation, "error")
+                if last_attempt:
+                    raise
+                continue
+
+            self.stats.count(
+                operation, "ok" if status < 400 else "status_{}".format(status)
+            )
+            if status >= 500 and not last_attempt:
+                continue
+            break
+
+        if status == 200:
+            _http_log.info("<<< %s OK", status)
+        else:
+            _http_log.warning("<<< %s %s", status, content.decode(errors="replace"))
+        return unwrap_response(self.codec.loads(content)), status
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        data, status = await self._req(
+            "/bots/{}".format(bot_token), "get", {}, "bots_get"
+        )
+        if status == 200:
+            return from_dict(Bot, data)
+        return None
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        resp, status = await self._req(
+            "/bots",
+            "post",
+            {"email": email, "name": name, "password": password, "team": team},
+            "bots_register",
+        )
+        if status == 200:
+            return from_dict(Bot, resp)
+        return None
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        resp, status = await self._req(
+            f"/bots/{bot_token}/join",
+            "post",
+            {"preferredBoardId": board_id},
+            "bots_join",
+        )
+        return status == 200
+
+    async def boards_get(self, board_id: int) -> Optional[Board]:
+        resp, status = await self._req(
+            "/boards/{}".format(board_id), "get", {}, "boards_get"
+        )
+        if status == 200:
+            return from_dict(Board, resp)
+        return None
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        resp, status = await self._req(
+            "/bots/{}/move".format(bot_token),
+            "post",
+            {"direction": direction},
+            "bots_move",
+        )
+        if status == 200:
+            return from_dict(Board, resp)
+        return None
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        try:
+            resp, status = await self._req(
+                "/bots/recover",
+                "post",
+                {"email": email, "password": password},
+                "bots_recover",
+            )
+            if status == 201:
+                return resp["id"]
+            return None
+        except:
+            return None
@@ -0,0 +1,72 @@
+import asyncio
+from itertools import count
+from time import monotonic
+from typing import NamedTuple, Optional
+
+from game.async_api import AsyncApi
+from game.models import Board
+
+
+class BoardSnapshot(NamedTuple):
+    # Increases by one with every board the feed hands out
+    version: int
+    board: Board
+    received_at: float
+
+
+class BoardFeed:
+    """
+    One board, fetched and decoded once, shared by every bot of a fleet on it.
+    Bots publish the board returned by their own moves and read the newest
+    snapshot; when it is older than max_age, concurrent readers share a single
+    GET instead of each fetching their own copy. Snapshots are shared between
+    controllers, so boards handed out must not be modified.
+    """
+
+    def __init__(self, api: AsyncApi, board_id: int, max_age: float = 0.0):
+        self.api = api
+        self.board_id = board_id
+        self.max_age = max_age
+        self.snapshot: Optional[BoardSnapshot] = None
+        self.fetches = 0
+        self.published = 0
+        self.reads = 0
+        self._versions = count(1)
+        self._fetching: Optional[asyncio.Task] = None
+
+    def publish(self, board: Board) -> BoardSnapshot:
+        self.published += 1
+        self.snapshot = BoardSnapshot(next(self._versions), board, monotonic())
+        return self.snapshot
+
+    async def _fetch(self) -> Optional[BoardSnapshot]:
+        self.fetches += 1
+        board = await self.api.boards_get(self.board_id)
+        if board is None:
+            return None
+        return self.publish(board)
+
+    async def latest(self, newer_than: int = 0) -> Optional[BoardSnapshot]:
+        """
+        Newest snapshot after version newer_than that is at most max_age old,
+        fetching one if there is none
+        :param newer_than: version the caller already has
+        :return: Optional[BoardSnapshot]
+        """
+        self.reads += 1
+        snapshot = self.snapshot
+        if (
+            snapshot is not None
+            and snapshot.version > newer_than
+            and monotonic() - snapshot.received_at <= self.max_age
+        ):
+            return snapshot
+        if self._fetching is None or self._fetching.done():
+            self._fetching = asyncio.ensure_future(self._fetch())
+        # Shielded, so one reader being cancelled doesn't cancel the others' GET
+        return await asyncio.shield(self._fetching)
+
+    def summary(self) -> str:
+        return "board feed: {} reads served by {} GETs and {} move responses".format(
+            self.reads, self.fetches, self.published - self.fetches
+        )
@@ -0,0 +1,117 @@
+from itertools import count
+from typing import Any, Dict, List, Optional
+
+from game.models import (
+    Board,
+    BoardChanges,
+    Feature,
+    GameObject,
+    SchemaError,
+    from_dict,
+)
+
+# Versions are unique across BoardStates, so caches shared between them (such
+# as the distance oracles) never mistake one state's board for another's
+_VERSIONS = count(1)
+
+
+class BoardState:
+    """
+    Keeps the previous tick's objects by id and rebuilds only what changed.
+    Unchanged objects and the features list are shared with the previous
+    Board, so they must be treated as read-only; the change set is attached
+    to every board as board.changes.
+    """
+
+    def __init__(self):
+        self.board: Optional[Board] = None
+        self.version: Optional[int] = None
+        self._raw: Dict[int, dict] = {}
+        self._objects: Dict[int, GameObject] = {}
+        self._raw_features: Optional[List[dict]] = None
+        self._features: List[Feature] = []
+
+    def reset(self) -> None:
+        self.board = None
+        self._raw = {}
+        self._objects = {}
+        self._raw_features = None
+        self._features = []
+
+    def apply(self, data: Dict[str, Any]) -> Board:
+        """
+        Build the board for a decoded (snake_case) board payload
+        :param data: dict
+        :return: Board
+        """
+        raw_features = data.get("features")
+        game_objects = data.get("game_objects")
+        # The header is small, so it goes through the regular decoder and its
+        # validation; features and objects are filled in below
+        board = from_dict(Board, {**data, "features": [], "game_objects": None})
+        if not isinstance(raw_features, list):
+            raise SchemaError(
+                "expected list, got {}".format(type(raw_features).__name__),
+                "features",
+            )
+
+        previous = self.board
+        if previous is not None and (
+            previous.id != board.id
+            or previous.width != board.width
+            or previous.height != board.height
+        ):
+            self.reset()
+            previous = None
+
+        if raw_features != self._raw_features:
+            self._features = [from_dict(Feature, feature) for feature in raw_features]
+            self._raw_features = raw_features
+
+        changes = BoardChanges(
+            next(_VERSIONS), previous_version=self.version if previous else None
+        )
+        self.version = changes.version
+        raw_by_id: Dict[int, dict] = {}
+        objects_by_id: Dict[int, GameObject] = {}
+        objects: Optional[List[GameObject]] = None
+        if game_objects is not None:
+            objects = []
+            for index, raw in enumerate(game_objects):
+                object_id = raw.get("id") if isinstance(raw, dict) else None
+                before = self._raw.get(object_id)
+                if before is not None and before == raw:
+                    obj = self._objects[object_id]
+                else:
+                    try:
+                        obj = from_dict(GameObject, raw)
+                    except SchemaError as e:
+                        raise e.nested("game_objects[{}]".format(index)) from None
+                    if before is None:
+                        changes.added.append(object_id)
+                        changes.types.add(obj.type)
+                    else:
+                        if before.get("position") != raw.get("position"):
+                            changes.moved.append(object_id)
+                        if before.get("properties") != raw.get(
+                            "properties"
+                        ) or before.get("type") != raw.get("type"):
+                            changes.changed.append(object_id)
+                        changes.types.add(obj.type)
+                        changes.types.add(self._objects[object_id].type)
+                raw_by_id[object_id] = raw
+                objects_by_id[object_id] = obj
+                objects.append(obj)
+
+        for object_id, obj in self._objects.items():
+            if object_id not in raw_by_id:
+                changes.removed.append(object_id)
+                changes.types.add(obj.type)
+
+        self._raw = raw_by_id
+        self._objects = objects_by_id
+        board.features = self._features
+        board.game_objects = objects
+        board.changes = changes
+        self.board = board
+        return board
@@ -0,0 +1,211 @@
+from array import array
+from typing import Any, Dict, List, Optional
+
+from game.models import Base, Board, Feature, GameObject, Position, Properties
+from game.models import SchemaError, from_dict
+
+# Properties held in the parallel arrays; everything else a game object carries
+# (bot score, base, timers, teleporter pair ids...) goes to the sparse extras.
+_PACKED_PROPERTIES = ("points", "diamonds", "name")
+_NONE = -1
+
+
+class CompactBoard(Board):
+    """
+    Board backed by parallel typed arrays instead of one GameObject (with its
+    Position and Properties) per object. Positions are packed as y * width + x
+    and types, names and owners are stored as small integer codes.
+
+    It is a drop-in Board: game_objects, bots, diamonds, get_bot... build
+    GameObject views on demand, and only for the rows that are asked for.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        width: int,
+        height: int,
+        features: List[Feature],
+        minimum_delay_between_moves: int,
+    ):
+        self.id = id
+        self.width = width
+        self.height = height
+        self.features = features
+        self.minimum_delay_between_moves = minimum_delay_between_moves
+        self.has_game_objects = True
+        self.type_names: List[str] = []
+        self.names: List[str] = []
+        self.ids = array("q")
+        self.cells = array("l")
+        self.type_codes = array("B")
+        self.points = array("h")
+        self.diamond_counts = array("h")
+        self.owners = array("h")
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self.bare_rows = set()
+        self._type_index: Dict[str, int] = {}
+        self._name_index: Dict[str, int] = {}
+        self._rows_by_type: Optional[Dict[int, List[int]]] = None
+        self._rows_by_id: Optional[Dict[int, int]] = None
+        self._objects_by_type: Dict[str, List[GameObject]] = {}
+        self._views: Dict[int, GameObject] = {}
+        self._game_objects: Optional[List[GameObject]] = None
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "CompactBoard":
+        """
+        Build a compact board straight from a decoded (snake_case) board payload
+        :param data: dict
+        :return: CompactBoard
+        """
+        try:
+            board = cls(
+                data["id"],
+                data["width"],
+                data["height"],
+                [from_dict(Feature, feature) for feature in data["features"]],
+                data["minimum_delay_between_moves"],
+            )
+        except KeyError as e:
+            raise SchemaError("missing field for Board", e.args[0]) from None
+
+        game_objects = data.get("game_objects")
+        if game_objects is None:
+            board.has_game_objects = False
+            return board
+        for index, obj in enumerate(game_objects):
+            try:
+                board._append(obj)
+            except (KeyError, TypeError) as e:
+                raise SchemaError(
+                    "malformed game object ({})".format(e),
+                    "game_objects[{}]".format(index),
+                ) from None
+        return board
+
+    def _code(self, table: List[str], index: Dict[str, int], value: str) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+
+    def _append(self, obj: dict) -> None:
+        row = len(self.ids)
+        position = obj["position"]
+        properties = obj.get("properties")
+        self.ids.append(obj["id"])
+        self.cells.append(position["y"] * self.width + position["x"])
+        self.type_codes.append(
+            self._code(self.type_names, self._type_index, obj["type"])
+        )
+        if properties is None:
+            self.points.append(_NONE)
+            self.diamond_counts.append(_NONE)
+            self.owners.append(_NONE)
+            self.bare_rows.add(row)
+            return
+
+        points = properties.get("points")
+        diamonds = properties.get("diamonds")
+        name = properties.get("name")
+        self.points.append(_NONE if points is None else points)
+        self.diamond_counts.append(_NONE if diamonds is None else diamonds)
+        self.owners.append(
+            _NONE if name is None else self._code(self.names, self._name_index, name)
+        )
+        extra = {k: v for k, v in properties.items() if k not in _PACKED_PROPERTIES}
+        if extra:
+            self.extras[row] = extra
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position_of(self, row: int) -> Position:
+        y, x = divmod(self.cells[row], self.width)
+        return Position(y=y, x=x)
+
+    def rows_of_type(self, type_name: str) -> List[int]:
+        if self._rows_by_type is None:
+            rows: Dict[int, List[int]] = {}
+            for row, code in enumerate(self.type_codes):
+                rows.setdefault(code, []).append(row)
+            self._rows_by_type = rows
+        code = self._type_index.get(type_name)
+        return [] if code is None else self._rows_by_type.get(code, [])
+
+    def view(self, row: int) -> GameObject:
+        """
+        GameObject for one row, built once and then reused
+        """
+        obj = self._views.get(row)
+        if obj is not None:
+            return obj
+
+        properties = None
+        if row not in self.bare_rows:
+            extra = dict(self.extras.get(row, ()))
+            if extra.get("base") is not None:
+                extra["base"] = from_dict(Base, extra["base"])
+            owner = self.owners[row]
+            points = self.points[row]
+            diamonds = self.diamond_counts[row]
+            properties = Properties(
+                points=None if points == _NONE else points,
+                diamonds=None if diamonds == _NONE else diamonds,
+                name=None if owner == _NONE else self.names[owner],
+                **{
+                    k: v
+                    for k, v in extra.items()
+                    if k in Properties.__dataclass_fields__
+                },
+            )
+        obj = GameObject(
+            id=self.ids[row],
+            position=self.position_of(row),
+            type=self.type_names[self.type_codes[row]],
+            properties=properties,
+        )
+        self._views[row] = obj
+        return obj
+
+    @property
+    def game_objects(self) -> Optional[List[GameObject]]:
+        if not self.has_game_objects:
+            return None
+        if self._game_objects is None:
+            self._game_objects = [self.view(row) for row in range(len(self.ids))]
+        return self._game_objects
+
+    def objects_of_type(self, type_name: str) -> List[GameObject]:
+        objects = self._objects_by_type.get(type_name)
+        if objects is None:
+            objects = [self.view(row) for row in self.rows_of_type(type_name)]
+            self._objects_by_type[type_name] = objects
+        return objects
+
+    def get_bot(self, bot) -> Optional[GameObject]:
+        owner = self._name_index.get(bot.name)
+        if owner is None:
+            return None
+        for row in self.rows_of_type("BotGameObject"):
+            if self.owners[row] == owner:
+                return self.view(row)
+        return None
+
+    def get_object(self, object_id: int) -> Optional[GameObject]:
+        if self._rows_by_id is None:
+            rows: Dict[int, int] = {}
+            for row, row_id in enumerate(self.ids):
+                rows.setdefault(row_id, row)
+            self._rows_by_id = rows
+        row = self._rows_by_id.get(object_id)
+        return None if row is None else self.view(row)
+
+    def invalidate_indexes(self) -> None:
+        self._rows_by_type = None
+        self._rows_by_id = None
+        self._objects_by_type = {}
+        self._views = {}
+        self._game_objects = None
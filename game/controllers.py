@@ -0,0 +1,14 @@
+from typing import Dict, Type
+
+from game.logic.base import BaseLogic
+from game.logic.crawler import Crawler
+from game.logic.nazarick import NazarickNPC
+from game.logic.planner import RoutePlanner
+from game.logic.random import RandomLogic
+
+CONTROLLERS: Dict[str, Type[BaseLogic]] = {
+    "Random": RandomLogic,
+    "Crawler": Crawler,
+    "Nazarick": NazarickNPC,
+    "Planner": RoutePlanner,
+}
@@ -0,0 +1,202 @@
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from game.models import Board, GameObject, Position
+from game.util import get_direction
+
+UNREACHABLE = float("inf")
+DEFAULT_MAX_FIELDS = 32
+_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class DistanceOracle:
+    """
+    Exact step counts on a board where stepping onto a teleporter moves the
+    bot to its pair. A distance field (one BFS over the grid, teleporter pairs
+    as zero-cost edges) is built per source cell and cached, so every query
+    after the first is a list lookup. Steps are symmetric, so a field built
+    from a target also answers "how far is anything from this target".
+
+    Fields of pinned cells (such as a bot's base) are never evicted; all fields
+    are dropped as soon as the board size or the teleporters change.
+    """
+
+    def __init__(self, max_fields: int = DEFAULT_MAX_FIELDS):
+        self.max_fields = max_fields
+        self.width = 0
+        self.height = 0
+        self.teleporter_signature: Tuple = ()
+        self.portals: Dict[int, int] = {}
+        self.fields: "OrderedDict[int, List[float]]" = OrderedDict()
+        self.pinned: Dict[int, List[float]] = {}
+        self.pinned_cells = set()
+        self.fields_built = 0
+        # BoardChanges.version of the last board seen, if it was diffed
+        self.version: Optional[int] = None
+
+    def update(self, board: Board) -> bool:
+        """
+        Sync with the board of this tick, returns True if the cache was dropped
+        """
+        changes = board.changes
+        if changes is not None and self.version is not None:
+            if changes.version == self.version:
+                return False
+            if changes.previous_version == self.version:
+                # Diffed against the board we synced with last time
+                self.version = changes.version
+                if not changes.touches("TeleportGameObject"):
+                    return False
+        self.version = changes.version if changes is not None else None
+
+        teleporters = board.teleporters
+        signature = tuple(
+            sorted(
+                (
+                    obj.id,
+                    obj.position.x,
+                    obj.position.y,
+                    obj.properties.pair_id if obj.properties else None,
+                )
+                for obj in teleporters
+            )
+        )
+        if (
+            board.width == self.width
+            and board.height == self.height
+            and signature == self.teleporter_signature
+        ):
+            return False
+
+        self.width = board.width
+        self.height = board.height
+        self.teleporter_signature = signature
+        self.portals = self._pair_portals(teleporters)
+        self.fields.clear()
+        self.pinned.clear()
+        # Controllers pin their targets every tick, so stale pins can go too
+        self.pinned_cells.clear()
+        return True
+
+    def _pair_portals(self, teleporters: List[GameObject]) -> Dict[int, int]:
+        by_id = {str(obj.id): obj for obj in teleporters}
+        portals: Dict[int, int] = {}
+        for obj in teleporters:
+            pair = None
+            if obj.properties and obj.properties.pair_id:
+                pair = by_id.get(obj.properties.pair_id)
+            if pair is None and len(teleporters) == 2:
+                pair = teleporters[1] if obj is teleporters[0] else teleporters[0]
+            if pair is not None and pair is not obj:
+                portals[self._cell(obj.position)] = self._cell(pair.position)
+        return portals
+
+    def _cell(self, position: Position) -> int:
+        return position.y * self.width + position.x
+
+    def _in_bounds(self, position: Position) -> bool:
+        return 0 <= position.x < self.width and 0 <= position.y < self.height
+
+    def _build(self, source: int) -> List[float]:
+        # 0-1 BFS: grid steps cost 1, teleporter pairs cost 0
+        width, height = self.width, self.height
+        portals = self.portals
+        dist = [UNREACHABLE] * (width * height)
+        dist[source] = 0
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            d = dist[cell]
+            pair = portals.get(cell)
+            if pair is not None and dist[pair] > d:
+                dist[pair] = d
+                queue.appendleft(pair)
+            y, x = divmod(cell, width)
+            step = d + 1
+            if x + 1 < width and dist[cell + 1] > step:
+                dist[cell + 1] = step
+                queue.append(cell + 1)
+            if x > 0 and dist[cell - 1] > step:
+                dist[cell - 1] = step
+                queue.append(cell - 1)
+            if y + 1 < height and dist[cell + width] > step:
+                dist[cell + width] = step
+                queue.append(cell + width)
+            if y > 0 and dist[cell - width] > step:
+                dist[cell - width] = step
+                queue.append(cell - width)
+        self.fields_built += 1
+        return dist
+
+    def pin(self, position: Position) -> None:
+        """
+        Keep the field of this cell for as long as the teleporters stay put
+        """
+        self.pinned_cells.add((position.x, position.y))
+
+    def field(self, position: Position) -> List[float]:
+        """
+        Steps from every cell (indexed y * width + x) to position
+        """
+        cell = self._cell(position)
+        if (position.x, position.y) in self.pinned_cells:
+            field = self.pinned.get(cell)
+            if field is None:
+                field = self.pinned[cell] = self._build(cell)
+            return field
+
+        field = self.fields.get(cell)
+        if field is not None:
+            self.fields.move_to_end(cell)
+            return field
+        field = self.fields[cell] = self._build(cell)
+        if len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+        return field
+
+    def distance(self, source: Position, target: Position) -> float:
+        """
+        Steps from source to target; the field of source is used (and built
+        if needed), so keep source fixed across many queries in a tick
+        """
+        if not self._in_bounds(source) or not self._in_bounds(target):
+            return UNREACHABLE
+        return self.field(source)[self._cell(target)]
+
+    def next_step(self, current: Position, target: Position) -> Tuple[int, int]:
+        """
+        A move along a shortest path to target, preferring the same move as
+        util.get_direction whenever it is one
+        """
+        if not self._in_bounds(current) or not self._in_bounds(target):
+            return get_direction(current.x, current.y, target.x, target.y)
+        field = self.field(target)
+        best = field[self._cell(current)]
+        if best == 0:
+            return (0, 0)
+
+        preferred = get_direction(current.x, current.y, target.x, target.y)
+        best_move: Optional[Tuple[int, int]] = None
+        for move in (preferred,) + _MOVES:
+            x, y = current.x + move[0], current.y + move[1]
+            if move == (0, 0) or not (0 <= x < self.width and 0 <= y < self.height):
+                continue
+            d = field[y * self.width + x]
+            if d < best:
+                best = d
+                best_move = move
+        return best_move if best_move is not None else preferred
+
+
+_ORACLES: Dict[int, DistanceOracle] = {}
+
+
+def oracle_for(board: Board) -> DistanceOracle:
+    """
+    The oracle shared by every controller in this process playing on board
+    """
+    oracle = _ORACLES.get(board.id)
+    if oracle is None:
+        oracle = _ORACLES[board.id] = DistanceOracle()
+    oracle.update(board)
+    return oracle
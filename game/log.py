@@ -0,0 +1,114 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+
+from colorama import Fore, Style
+
+ROOT = "diamonds"
+DEFAULT_LEVEL = "INFO"
+
+LEVEL_COLORS = {
+    logging.DEBUG: Style.DIM,
+    logging.WARNING: Fore.YELLOW + Style.BRIGHT,
+    logging.ERROR: Fore.RED + Style.BRIGHT,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT,
+}
+
+
+def get_logger(category: str) -> logging.Logger:
+    """
+    Logger for one category (http, moves, ...), sampled and leveled as a unit
+    """
+    return logging.getLogger("{}.{}".format(ROOT, category))
+
+
+class ColorFormatter(logging.Formatter):
+    """
+    Plain message for INFO, like the old prints; other levels get a colored tag
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.levelno == logging.INFO:
+            return message
+        return "{}{}:{} {}".format(
+            LEVEL_COLORS.get(record.levelno, ""),
+            record.levelname.capitalize(),
+            Style.RESET_ALL,
+            message,
+        )
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keeps one record in every N per category; errors are always kept
+    """
+
+    def __init__(self, every: Dict[str, int]):
+        super().__init__()
+        self.every = every
+        self.seen: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        category = record.name[len(ROOT) + 1 :]
+        rate = self.every.get(category, 1)
+        if rate <= 1:
+            return True
+        seen = self.seen.get(category, 0)
+        self.seen[category] = seen + 1
+        return seen % rate == 0
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats the message in the calling thread; the
+    # records logged here only carry immutable arguments, so formatting is
+    # left to the writer thread
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sampling(spec: Optional[str]) -> Dict[str, int]:
+    """
+    Parse "http=10,moves=100" into {"http": 10, "moves": 100}
+    :param spec: str
+    :return: Dict[str, int]
+    """
+    every: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        category, _, rate = item.partition("=")
+        every[category.strip()] = int(rate)
+    return every
+
+
+def setup_logging(
+    level: str = DEFAULT_LEVEL,
+    sample: Optional[Dict[str, int]] = None,
+    stream: Optional[TextIO] = None,
+) -> QueueListener:
+    """
+    Route every category through a queue to one background writer thread, so
+    logging on the hot path is a filter check and a queue put
+    """
+    records = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    handler.addFilter(SampleFilter(sample or {}))
+
+    root = logging.getLogger(ROOT)
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+    root.propagate = False
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(ColorFormatter())
+    listener = QueueListener(records, writer)
+    listener.start()
+    # Drain what is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
@@ -17,24 +17,13 @@ class UtilityScore:
     immediate_target_pos: models.Position
 
 
-def calculate_utility(
-    immediate_target_pos: models.Position,
+def target_reward_and_urgency(
     final_target_type: str,
     final_target_obj: Optional[models.GameObject],
-    full_path_distance: int,
-    board_bot: models.GameObject,
+    properties: models.Properties,
     board: models.Board,
     weights: Dict[str, float],
-    committed_target_info: Optional[UtilityScore],
-    is_via_teleporter: bool = False,
-) -> UtilityScore:
-    current_pos = board_bot.position
-    properties = board_bot.properties
-
-    distance_penalty = weights["distance"] * full_path_distance
-    if is_via_teleporter:
-        distance_penalty += weights["teleporter_usage_cost"]
-
+) -> Tuple[float, float]:
     diamonds_carried = properties.diamonds if properties.diamonds is not None else 0
     inventory_size = (
         properties.inventory_size
@@ -44,7 +33,6 @@ def calculate_utility(
     can_tackle = properties.can_tackle if properties.can_tackle is not None else False
 
     reward_value = 0.0
-    risk_penalty = 0.0
     urgency_bonus = 0.0
 
     if final_target_type == "base":
@@ -119,6 +107,59 @@ def calculate_utility(
         ):
             reward_value += weights["reset_penalty_time_low"]
 
+    return reward_value, urgency_bonus
+
+
+def adjust_for_inventory(
+    final_target_type: str,
+    reward_value: float,
+    urgency_bonus: float,
+    diamonds_carried: int,
+    inventory_size: int,
+) -> Tuple[float, float]:
+    if final_target_type != "base" and final_target_type != "diamond_button":
+        if diamonds_carried >= inventory_size:
+            reward_value = -100.0
+            urgency_bonus = 0.0
+        elif (
+            diamonds_carried
+            >= inventory_size * BotConfig.CONSIDER_TP_PATH_URGENT_BASE_INVENTORY_RATIO
+        ):
+            reward_value *= 0.2
+            urgency_bonus *= 0.2
+    return reward_value, urgency_bonus
+
+
+def calculate_utility(
+    immediate_target_pos: models.Position,
+    final_target_type: str,
+    final_target_obj: Optional[models.GameObject],
+    full_path_distance: int,
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+    is_via_teleporter: bool = False,
+) -> UtilityScore:
+    current_pos = board_bot.position
+    properties = board_bot.properties
+
+    distance_penalty = weights["distance"] * full_path_distance
+    if is_via_teleporter:
+        distance_penalty += weights["teleporter_usage_cost"]
+
+    diamonds_carried = properties.diamonds if properties.diamonds is not None else 0
+    inventory_size = (
+        properties.inventory_size
+        if properties.inventory_size is not None
+        else BotConfig.MAX_INVENTORY_DEFAULT
+    )
+
+    reward_value, urgency_bonus = target_reward_and_urgency(
+        final_target_type, final_target_obj, properties, board, weights
+    )
+    risk_penalty = 0.0
+
     enemies_on_board = (
         [
             bot
@@ -151,16 +192,9 @@ def calculate_utility(
                     * risk_multiplier
                 )
 
-    if final_target_type != "base" and final_target_type != "diamond_button":
-        if diamonds_carried >= inventory_size:
-            reward_value = -100.0
-            urgency_bonus = 0.0
-        elif (
-            diamonds_carried
-            >= inventory_size * BotConfig.CONSIDER_TP_PATH_URGENT_BASE_INVENTORY_RATIO
-        ):
-            reward_value *= 0.2
-            urgency_bonus *= 0.2
+    reward_value, urgency_bonus = adjust_for_inventory(
+        final_target_type, reward_value, urgency_bonus, diamonds_carried, inventory_size
+    )
 
     total_utility = reward_value + distance_penalty + risk_penalty + urgency_bonus
 
@@ -1,11 +1,20 @@
-from typing import Tuple, List
+from typing import Optional, Tuple, List
 from game import models
+from game.distance import DistanceOracle
 import random
 
 
 def calculate_next_step(
-    current: models.Position, target: models.Position, board: models.Board
+    current: models.Position,
+    target: models.Position,
+    board: models.Board,
+    oracle: Optional[DistanceOracle] = None,
 ) -> Tuple[int, int]:
+    if oracle is not None:
+        move_dx, move_dy = oracle.next_step(current, target)
+        if (move_dx, move_dy) != (0, 0) and board.can_move(current, move_dx, move_dy):
+            return (move_dx, move_dy)
+
     dx_target = target.x - current.x
     dy_target = target.y - current.y
     preferred_moves: List[Tuple[int, int]] = []
@@ -34,7 +43,7 @@ def calculate_next_step(
             preferred_moves.append(move)
 
     for move_dx, move_dy in preferred_moves:
-        if board.is_valid_move(current, move_dx, move_dy):
+        if board.can_move(current, move_dx, move_dy):
             return (move_dx, move_dy)
     return (0, 0)
 
@@ -45,6 +54,6 @@ def get_random_valid_move(
     possible_moves = [(1, 0), (0, 1), (-1, 0), (0, -1)]
     random.shuffle(possible_moves)
     for dx_rand, dy_rand in possible_moves:
-        if board.is_valid_move(current, dx_rand, dy_rand):
+        if board.can_move(current, dx_rand, dy_rand):
             return (dx_rand, dy_rand)
     return (0, 0)
@@ -1,17 +1,41 @@
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Set
 from game import models
 from . import nazarick_datafunction as ndf
 from .nazarick_config import BotConfig
-from .nazarick_calculations import calculate_utility, UtilityScore
+from .nazarick_calculations import (
+    adjust_for_inventory,
+    calculate_utility,
+    target_reward_and_urgency,
+    UtilityScore,
+)
+from game.distance import DistanceOracle
 from game.util import position_equals
+from dataclasses import dataclass
 
 
-def find_best_actionable_target(
+class TargetPath(NamedTuple):
+    """
+    One way of reaching a final target: walk straight to it or step into the
+    entry teleporter first (immediate_target_pos is then the teleporter)
+    """
+
+    immediate_target_pos: models.Position
+    target_type: str
+    target_obj: models.GameObject
+    distance: int
+    via_teleporter: bool
+
+
+def collect_target_paths(
     board_bot: models.GameObject,
     board: models.Board,
-    weights: Dict[str, float],
-    committed_target_info: Optional[UtilityScore],
-) -> Optional[UtilityScore]:
+    oracle: Optional[DistanceOracle] = None,
+) -> List[TargetPath]:
+    """
+    Without an oracle distances are Manhattan and the nearest teleporter is
+    tried as a separate path. With one, distances already take the best
+    teleporter route and the bot walks straight at the final target.
+    """
     current_pos = board_bot.position
     properties = board_bot.properties
 
@@ -33,10 +57,7 @@ def find_best_actionable_target(
             for diamond_obj in board.diamonds:
                 final_target_candidates.append((diamond_obj, "diamond"))
 
-    all_game_objects = board.game_objects if board.game_objects else []
-    diamond_button_objects: List[models.GameObject] = [
-        obj for obj in all_game_objects if obj.type == "DiamondButtonGameObject"
-    ]
+    diamond_button_objects: List[models.GameObject] = board.diamond_buttons
     diamond_button: Optional[models.GameObject] = (
         diamond_button_objects[0] if diamond_button_objects else None
     )
@@ -59,56 +80,48 @@ def find_best_actionable_target(
                     if enemy_diamonds > 0:
                         final_target_candidates.append((enemy_obj, "enemy"))
 
-    if not final_target_candidates:
-        return None
-
-    all_teleporter_objects = [
-        obj for obj in all_game_objects if obj.type == "TeleportGameObject"
-    ]
+    all_teleporter_objects = board.teleporters
     entry_tp_obj, exit_tp_obj, dist_to_entry_tp = ndf.determineTargetAndExitTeleporters(
         all_teleporter_objects, current_pos
     )
-    best_utility_score: Optional[UtilityScore] = None
+    paths: List[TargetPath] = []
 
     for final_target_obj, final_target_type in final_target_candidates:
         final_target_pos = final_target_obj.position
 
-        if final_target_type == "diamond_button":
+        if oracle is not None:
+            dist = oracle.distance(current_pos, final_target_pos)
+            paths.append(
+                TargetPath(
+                    final_target_pos,
+                    final_target_type,
+                    final_target_obj,
+                    dist,
+                    dist < ndf.howManyStepNeeded(current_pos, final_target_pos),
+                )
+            )
+        elif final_target_type == "diamond_button":
             dist_to_button = ndf.howManyStepNeeded(current_pos, final_target_pos)
-            utility_button = calculate_utility(
-                final_target_pos,
-                final_target_type,
-                final_target_obj,
-                dist_to_button,
-                board_bot,
-                board,
-                weights,
-                committed_target_info,
-                False,
+            paths.append(
+                TargetPath(
+                    final_target_pos,
+                    final_target_type,
+                    final_target_obj,
+                    dist_to_button,
+                    False,
+                )
             )
-            if (
-                best_utility_score is None
-                or utility_button.total > best_utility_score.total
-            ):
-                best_utility_score = utility_button
         else:
             dist_direct = ndf.howManyStepNeeded(current_pos, final_target_pos)
-            utility_direct = calculate_utility(
-                final_target_pos,
-                final_target_type,
-                final_target_obj,
-                dist_direct,
-                board_bot,
-                board,
-                weights,
-                committed_target_info,
-                False,
+            paths.append(
+                TargetPath(
+                    final_target_pos,
+                    final_target_type,
+                    final_target_obj,
+                    dist_direct,
+                    False,
+                )
             )
-            if (
-                best_utility_score is None
-                or utility_direct.total > best_utility_score.total
-            ):
-                best_utility_score = utility_direct
 
             if entry_tp_obj and exit_tp_obj and final_target_type != "enemy":
                 dist_exit_to_final_target = ndf.howManyStepNeeded(
@@ -126,21 +139,259 @@ def find_best_actionable_target(
                 )
 
                 if consider_tp_path:
-                    utility_via_tp = calculate_utility(
-                        entry_tp_obj.position,
-                        final_target_type,
-                        final_target_obj,
-                        full_dist_via_tp,
-                        board_bot,
-                        board,
-                        weights,
-                        committed_target_info,
-                        True,
+                    paths.append(
+                        TargetPath(
+                            entry_tp_obj.position,
+                            final_target_type,
+                            final_target_obj,
+                            full_dist_via_tp,
+                            True,
+                        )
                     )
-                    if (
-                        best_utility_score is None
-                        or utility_via_tp.total > best_utility_score.total
-                    ):
-                        best_utility_score = utility_via_tp
+
+    return paths
+
+
+def score_target_paths(
+    paths: List[TargetPath],
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+) -> Optional[UtilityScore]:
+    best_utility_score: Optional[UtilityScore] = None
+
+    for path in paths:
+        utility = calculate_utility(
+            path.immediate_target_pos,
+            path.target_type,
+            path.target_obj,
+            path.distance,
+            board_bot,
+            board,
+            weights,
+            committed_target_info,
+            path.via_teleporter,
+        )
+        if best_utility_score is None or utility.total > best_utility_score.total:
+            best_utility_score = utility
+
+    return best_utility_score
+
+
+def find_best_actionable_target(
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+    oracle: Optional[DistanceOracle] = None,
+) -> Optional[UtilityScore]:
+    return score_target_paths(
+        collect_target_paths(board_bot, board, oracle),
+        board_bot,
+        board,
+        weights,
+        committed_target_info,
+    )
+
+
+# Paths scored between two should_stop() checks
+STOP_CHECK_INTERVAL = 16
+
+
+@dataclass
+class PruningStats:
+    searches: int = 0
+    evaluated: int = 0
+    pruned: int = 0
+    # Searches cut short by the controller's deadline
+    stopped: int = 0
+
+
+def _reward_key(path: TargetPath) -> tuple:
+    # Reward and urgency only depend on the target type and these few values
+    props = path.target_obj.properties
+    if path.target_type == "diamond":
+        points = props.points if props and props.points is not None else 1
+        return ("diamond", points)
+    if path.target_type == "enemy":
+        if not props:
+            return ("enemy", None)
+        return ("enemy", props.diamonds if props.diamonds is not None else 0)
+    return (path.target_type,)
+
+
+def _risk_upper_bound(
+    board_bot: models.GameObject, board: models.Board, weights: Dict[str, float]
+) -> float:
+    # Every risk term has the sign of the weight, so with the usual negative
+    # weight the risk can only lower a path's utility
+    if weights["enemy_risk"] <= 0:
+        return 0.0
+    properties = board_bot.properties
+    diamonds_carried = properties.diamonds if properties.diamonds is not None else 0
+    worst_case = (
+        weights["enemy_risk"]
+        * (BotConfig.ENEMY_DANGER_RADIUS + 1)
+        * (1 + (diamonds_carried * 0.5))
+    )
+    bound = 0.0
+    for enemy_obj in board.bots or []:
+        if (
+            enemy_obj.properties
+            and properties.name != enemy_obj.properties.name
+            and enemy_obj.properties.can_tackle
+        ):
+            bound += worst_case
+    return bound
+
+
+def utility_upper_bounds(
+    paths: List[TargetPath],
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+) -> List[float]:
+    """
+    For each path, a value calculate_utility can never exceed: every term is
+    exact except the enemy risk, which is replaced by its largest possible value
+    """
+    properties = board_bot.properties
+    diamonds_carried = properties.diamonds if properties.diamonds is not None else 0
+    inventory_size = (
+        properties.inventory_size
+        if properties.inventory_size is not None
+        else BotConfig.MAX_INVENTORY_DEFAULT
+    )
+    risk_bound = _risk_upper_bound(board_bot, board, weights)
+    rewards: Dict[tuple, Tuple[float, float]] = {}
+    bounds: List[float] = []
+
+    for path in paths:
+        key = _reward_key(path)
+        if key not in rewards:
+            reward_value, urgency_bonus = target_reward_and_urgency(
+                path.target_type, path.target_obj, properties, board, weights
+            )
+            rewards[key] = adjust_for_inventory(
+                path.target_type,
+                reward_value,
+                urgency_bonus,
+                diamonds_carried,
+                inventory_size,
+            )
+        reward_value, urgency_bonus = rewards[key]
+
+        distance_penalty = weights["distance"] * path.distance
+        if path.via_teleporter:
+            distance_penalty += weights["teleporter_usage_cost"]
+
+        bound = reward_value + distance_penalty + risk_bound + urgency_bonus
+        if (
+            committed_target_info
+            and position_equals(
+                path.immediate_target_pos, committed_target_info.immediate_target_pos
+            )
+            and path.target_type == committed_target_info.target_type
+        ):
+            bound += weights["commitment_bonus"]
+        bounds.append(bound)
+
+    return bounds
+
+
+def find_best_actionable_target_pruned(
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+    stats: Optional[PruningStats] = None,
+    oracle: Optional[DistanceOracle] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Optional[UtilityScore]:
+    """
+    Same result as find_best_actionable_target, but paths are scored in order
+    of their upper bound and the search stops once no remaining bound can beat
+    the best utility found. Ties go to the earlier path, as in the full search.
+    If should_stop() turns True first, the best path scored so far is returned.
+    """
+    paths = collect_target_paths(board_bot, board, oracle)
+    bounds = utility_upper_bounds(
+        paths, board_bot, board, weights, committed_target_info
+    )
+    return search_with_bounds(
+        paths,
+        bounds,
+        board_bot,
+        board,
+        weights,
+        committed_target_info,
+        stats,
+        should_stop,
+    )
+
+
+def search_with_bounds(
+    paths: List[TargetPath],
+    bounds: List[float],
+    board_bot: models.GameObject,
+    board: models.Board,
+    weights: Dict[str, float],
+    committed_target_info: Optional[UtilityScore],
+    stats: Optional[PruningStats] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Optional[UtilityScore]:
+    order = sorted(range(len(paths)), key=lambda i: (-bounds[i], i))
+
+    best_utility_score: Optional[UtilityScore] = None
+    best_index = -1
+    evaluated = 0
+    pruned = 0
+    stopped = False
+
+    for rank, index in enumerate(order):
+        if (
+            should_stop is not None
+            and best_utility_score is not None
+            and evaluated % STOP_CHECK_INTERVAL == 0
+            and should_stop()
+        ):
+            stopped = True
+            break
+        if best_utility_score is not None:
+            if bounds[index] < best_utility_score.total:
+                pruned += len(order) - rank
+                break
+            if bounds[index] == best_utility_score.total and index > best_index:
+                pruned += 1
+                continue
+
+        path = paths[index]
+        utility = calculate_utility(
+            path.immediate_target_pos,
+            path.target_type,
+            path.target_obj,
+            path.distance,
+            board_bot,
+            board,
+            weights,
+            committed_target_info,
+            path.via_teleporter,
+        )
+        evaluated += 1
+        if (
+            best_utility_score is None
+            or utility.total > best_utility_score.total
+            or (utility.total == best_utility_score.total and index < best_index)
+        ):
+            best_utility_score = utility
+            best_index = index
+
+    if stats is not None:
+        stats.searches += 1
+        stats.evaluated += evaluated
+        stats.pruned += pruned
+        stats.stopped += stopped
 
     return best_utility_score
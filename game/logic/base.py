@@ -1,9 +1,86 @@
+import copy
+import time
 from abc import ABC
-from typing import Tuple
+from typing import Any, Optional, Tuple
 
-from game.models import Board, GameObject
+from game.models import Board, GameObject, Position
+from game.util import get_direction, position_equals
+
+_CARDINAL_MOVES = ((1, 0), (0, 1), (-1, 0), (0, -1))
 
 
 class BaseLogic(ABC):
+    # perf_counter() time by which next_move should return, set by the game
+    # loop before each call; None means no limit
+    deadline: Optional[float] = None
+    # Steps around our bot within which other bots can change next_move's
+    # answer, see speculation.board_signature; None means bots anywhere can
+    speculation_radius: Optional[int] = None
+
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def speculation_clock(self, board_bot: GameObject, board: Board) -> Any:
+        """
+        What next_move makes of the clocks on board, see
+        speculation.board_signature: a move decided on a predicted board is
+        only reused when this is the same on the real one. By default our own
+        bot's time left; controllers override it with what they derive from it
+        """
+        return board_bot.properties.milliseconds_left if board_bot.properties else None
+
+    def should_stop(self) -> bool:
+        """
+        Cancellation check for long searches: True once the deadline passed
+        """
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def snapshot(self) -> "BaseLogic":
+        """
+        A copy to call next_move on without changing this controller, such as
+        a speculative decision. Attributes next_move assigns stay separate,
+        objects it only updates in place (caches, counters) are shared;
+        controllers that keep other state in place override this
+        """
+        return copy.copy(self)
+
+    def restore(self, snapshot: "BaseLogic") -> None:
+        """
+        Take over the state of a snapshot, once its decision is the one used
+        """
+        self.__dict__.clear()
+        self.__dict__.update(snapshot.__dict__)
+
+    def fallback_target(
+        self, board_bot: GameObject, board: Board
+    ) -> Optional[Position]:
+        """
+        Where the fallback move heads; controllers with a committed target
+        override this
+        """
+        return board_bot.properties.base if board_bot.properties else None
+
+    def fallback_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        """
+        Cheap move used when next_move misses its deadline: one greedy step
+        towards fallback_target, or any valid step when already there
+        """
+        return fallback_step(board_bot, board, self.fallback_target(board_bot, board))
+
+
+def fallback_step(
+    board_bot: GameObject, board: Board, target: Optional[Position]
+) -> Tuple[int, int]:
+    """
+    One greedy step towards target, or any valid step when already there or
+    the greedy step is blocked
+    """
+    current = board_bot.position
+    if target is not None and not position_equals(current, target):
+        delta_x, delta_y = get_direction(current.x, current.y, target.x, target.y)
+        if board.can_move(current, delta_x, delta_y):
+            return delta_x, delta_y
+    for delta_x, delta_y in _CARDINAL_MOVES:
+        if board.can_move(current, delta_x, delta_y):
+            return delta_x, delta_y
+    return 0, 0
@@ -1,16 +1,26 @@
 import random
-from typing import Optional, List
+from typing import Optional, List, Sequence
 from game.logic.base import BaseLogic
 from game.models import GameObject, Board, Position
+from game.distance import DistanceOracle, oracle_for
+from game.log import get_logger
+from game.spatial import DiamondIndex, index_for, teleporter_shortcuts
 from ..util import get_direction
 
+_log = get_logger("crawler")
+
 
 class Crawler(BaseLogic):
+    # bot lain hanya dikejar kalau jaraknya kurang dari 3
+    speculation_radius = 2
+
     def __init__(self):
         # inisiasi data awal
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
         self.goal_position: Optional[Position] = None
         self.current_direction = 0
+        self.oracle: Optional[DistanceOracle] = None
+        self.diamond_index: Optional[DiamondIndex] = None
     
     ##############################################
     # mengitung jarak manhattan antara dua titik #
@@ -23,29 +33,44 @@ class Crawler(BaseLogic):
     ####################################################
     # membagi point dari objek tersebut lalu dibagi dengan step yang dibutuhkan untuk menuju objek tersebut
     def get_density(self, diamond: GameObject, bot_pos: Position) -> float:
+        if self.oracle:
+            # jarak sebenarnya (sudah memperhitungkan teleporter)
+            return diamond.properties.points / self.oracle.distance(bot_pos, diamond.position)
         return diamond.properties.points / self.needed_steps(bot_pos, diamond.position)
     
     #################################################################################
     # mencari diamond dengan kepadatan efisiensi tertinggi dan menjadikannya tujuan #
     #################################################################################
-    def generate_best_density(self, diamonds: List[GameObject], board_bot: GameObject, start_teleporter_position: Position, end_teleporter_position: Position, distance_to_targetTeleporter : int) -> None:
-        curr_density_max = 0
-        curr_density_max_pos = diamonds[0].position
+    def generate_best_density(self, diamonds: List[GameObject], board_bot: GameObject, start_teleporter_position: Position, end_teleporter_position: Position, distance_to_targetTeleporter : int, teleporters: Sequence[GameObject] = ()) -> None:
         bot_position = board_bot.position
-
-        best_direct = (0, None)
-        best_teleport = (0, None)
-
-        for diamond in diamonds:
-            d = self.get_density(diamond, bot_position)
-            if d > best_direct[0]:
-                best_direct = (d, diamond.position)
-
-            td = diamond.properties.points / (
-                distance_to_targetTeleporter + self.needed_steps(diamond.position, end_teleporter_position)
-            )
-            if td > best_teleport[0]:
-                best_teleport = (td, start_teleporter_position)
+        index = self.diamond_index
+        if index is None or index.source is not diamonds:
+            # tanpa index yang bertahan antar tick, scan semua diamond lebih murah
+            best_direct = (0, None)
+            best_teleport = (0, None)
+
+            for diamond in diamonds:
+                d = self.get_density(diamond, bot_position)
+                if d > best_direct[0]:
+                    best_direct = (d, diamond.position)
+
+                td = diamond.properties.points / (
+                    distance_to_targetTeleporter + self.needed_steps(diamond.position, end_teleporter_position)
+                )
+                if td > best_teleport[0]:
+                    best_teleport = (td, start_teleporter_position)
+        else:
+            # -- diamond terbaik langsung; bucket yang tidak mungkin menang tidak dicek -- #
+            if self.oracle:
+                # jarak oracle bisa lebih pendek dari manhattan hanya lewat teleporter
+                d, diamond = index.best_density(bot_position, distance=self.oracle.distance, shortcuts=teleporter_shortcuts(bot_position, teleporters))
+            else:
+                d, diamond = index.best_density(bot_position)
+            best_direct = (d, diamond.position if diamond else None)
+
+            # -- diamond terbaik lewat teleporter, dihitung dari teleporter keluar -- #
+            td, diamond = index.best_density(end_teleporter_position, offset=distance_to_targetTeleporter)
+            best_teleport = (td, start_teleporter_position if diamond else None)
 
         # Pilih yang paling tinggi di antara keduanya
         if best_direct[0] >= best_teleport[0]:
@@ -53,6 +78,27 @@ class Crawler(BaseLogic):
         else:
             self.goal_position = best_teleport[1]
 
+    ############################################
+    # mengecek apakah diamond tujuan masih ada #
+    ############################################
+    def goal_exists(self, diamonds: List[GameObject]) -> bool:
+        if self.diamond_index is not None and self.diamond_index.source is diamonds:
+            return self.diamond_index.contains(self.goal_position)
+        return any(self.goal_position == diamond.position for diamond in diamonds)
+
+    ##################################################
+    # waktu yang dibaca next_move, untuk --speculate #
+    ##################################################
+    def speculation_clock(self, board_bot: GameObject, board: Board) -> Optional[bool]:
+        # hanya dipakai untuk cek "waktu hampir habis" di logic kembali ke rumah
+        props = board_bot.properties
+        if props.milliseconds_left is None:
+            return None
+        oracle = oracle_for(board)
+        oracle.pin(props.base)
+        distance = oracle.distance(props.base, board_bot.position)
+        return props.milliseconds_left < (1000 * distance + 2000) and props.milliseconds_left < 8000
+
     ################################
     # menghitung jarak bot ke base #
     ################################
@@ -60,8 +106,19 @@ class Crawler(BaseLogic):
         # mencari jarak bot dengan base
         current_position = board_bot.position
         base = board_bot.properties.base
+        if self.oracle:
+            return self.oracle.distance(base, current_position)
         return abs(base.x - current_position.x) + abs(base.y - current_position.y)
 
+    #########################################################
+    # tujuan gerakan cadangan jika next_move melewati batas #
+    #########################################################
+    def fallback_target(self, board_bot: GameObject, board: Board) -> Optional[Position]:
+        # lanjutkan ke tujuan terakhir, kalau belum ada pulang ke base
+        if self.goal_position:
+            return self.goal_position
+        return super().fallback_target(board_bot, board)
+
 
 
     #############################
@@ -72,6 +129,9 @@ class Crawler(BaseLogic):
         base = board_bot.properties.base # base adalah koordinat rumah
         list_diamonds = board.diamonds # list diamonds adalah list koordinat dari diamond
         current_position = board_bot.position # current_position adalah koordinat posisi sekarang
+        self.oracle = oracle_for(board) # jarak base dihitung sekali selama teleporter tidak pindah
+        self.oracle.pin(base)
+        self.diamond_index = index_for(board) # index posisi diamond, hanya ada kalau board di-diff (--incremental-boards)
 
 
 
@@ -80,7 +140,7 @@ class Crawler(BaseLogic):
         #############################
         # mengininisiasi teleporter #
         ############################
-        list_teleporters = [d for d in board.game_objects if d.type == "TeleportGameObject"]
+        list_teleporters = board.teleporters
         marco = list_teleporters[0]
         polo = list_teleporters[1]
         targetTeleporter = marco
@@ -92,7 +152,7 @@ class Crawler(BaseLogic):
         if dp < dm:
             targetTeleporter = polo
             exitTeleporter = marco
-        diamond_button = [d for d in board.game_objects if d.type == "DiamondButtonGameObject"]
+        diamond_button = board.diamond_buttons
         # --Cari jarak ke teleporter terdekat -- #
         distance_to_targetTeleporter = self.needed_steps(targetTeleporter.position,current_position)
         
@@ -104,7 +164,7 @@ class Crawler(BaseLogic):
         # logic move selanjutnya #
         ##########################
         # -- logika kembali ke rumah -- #
-        if props.diamonds >= 3 or (props.milliseconds_left < (1000* self.needed_steps(base, board_bot.position)+2000) and props.milliseconds_left < 8000): # stack diamond yang dipegang cukup 3 saja agar tidak terlalu beresiko
+        if props.diamonds >= 3 or (props.milliseconds_left < (1000* self.basedistance(board_bot)+2000) and props.milliseconds_left < 8000): # stack diamond yang dipegang cukup 3 saja agar tidak terlalu beresiko
             teleporter_base_distance = self.needed_steps(exitTeleporter.position,base)
             td = teleporter_base_distance + distance_to_targetTeleporter
             distanceBotBase = self.needed_steps(base,current_position)
@@ -126,8 +186,8 @@ class Crawler(BaseLogic):
             self.goal_position = diamond_button[0].position
         
         # -- logika jika diamond, teleporter atau memang tidak ada tujuan maka buat tujuan -- #
-        elif all(self.goal_position != diamond.position for diamond in list_diamonds) or all (targetTeleporter.position != teleporter.position for teleporter in list_teleporters) or self.goal_position is None:
-            self.generate_best_density(list_diamonds, board_bot, targetTeleporter.position, exitTeleporter.position, distance_to_targetTeleporter)
+        elif not self.goal_exists(list_diamonds) or all (targetTeleporter.position != teleporter.position for teleporter in list_teleporters) or self.goal_position is None:
+            self.generate_best_density(list_diamonds, board_bot, targetTeleporter.position, exitTeleporter.position, distance_to_targetTeleporter, list_teleporters)
      
         # -- logika jika lewat base ketika mencari diamond, akan kembali ke base -- #
         elif (self.basedistance(board_bot)==2 and props.diamonds >2) or (self.basedistance(board_bot)==1 and props.diamonds >0):
@@ -143,7 +203,8 @@ class Crawler(BaseLogic):
 
         # -- logika jika bot menuju rumah dan ketika diperjalanan sejauh 1 petak ada diamond dan storage < 5, maka akan mengambil diamond tersebut -- # 
         if self.goal_position == base and props.diamonds < 5:
-            for diamond in list_diamonds:
+            nearby = self.diamond_index.within(current_position, 1) if self.diamond_index else list_diamonds
+            for diamond in nearby:
                 if self.needed_steps(current_position, diamond.position) == 1:
                     self.goal_position = diamond.position
                     break
@@ -152,7 +213,7 @@ class Crawler(BaseLogic):
         ########################################
         # logic mengejar dan membunuh bot musuh #
         ########################################
-        bots = [obj for obj in board.game_objects if obj.type == "BotGameObject"]
+        bots = board.bots
 
         for bot in bots:
             if bot.properties.name != board_bot.properties.name:
@@ -160,11 +221,14 @@ class Crawler(BaseLogic):
                 if dist == 1 or (dist < 3 and bot.properties.diamonds > 2):
                     # Jika syarat terpenuhi, kejar bot musuh
                     delta_x, delta_y = get_direction(current_position.x, current_position.y, bot.position.x, bot.position.y)
-                    print(f"Mengejar bot musuh: {bot.properties.name} di {bot.position}")
+                    _log.info("Mengejar bot musuh: %s di %s", bot.properties.name, bot.position)
                     return delta_x, delta_y
                     
 
         # -- mengambil posisi koordinat saat ini dan memasukan tujuan ke delta x dan y, lalu di return untuk di eksekusi langkahnya -- #
         current_position = board_bot.position
+        # -- tujuan teleporter tetap lurus, selain itu ikuti jalur terpendek (boleh lewat teleporter) -- #
+        if all(self.goal_position != teleporter.position for teleporter in list_teleporters):
+            return self.oracle.next_step(current_position, self.goal_position)
         delta_x, delta_y = get_direction(current_position.x, current_position.y, self.goal_position.x, self.goal_position.y)
         return delta_x, delta_y
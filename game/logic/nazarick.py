@@ -1,11 +1,12 @@
 from game.logic.base import BaseLogic
 from game import models
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import random
 
 from game.logic.NazarickSublogic.nazarick_config import BotConfig
 from game.logic.NazarickSublogic import nazarick_targetfinder as tf
 from game.logic.NazarickSublogic import nazarick_movement as mv
+from game.distance import oracle_for
 from game.util import position_equals
 from dataclasses import dataclass
 
@@ -22,11 +23,32 @@ class UtilityScore:
 
 
 class NazarickNPC(BaseLogic):
-    def __init__(self):
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
         self.config = BotConfig()
+        # Tuned weights (see tune.py) override BotConfig.WEIGHTS key by key
+        self.weights = {**BotConfig.WEIGHTS, **(weights or {})}
         self.last_position: Optional[models.Position] = None
         self.stuck_counter: int = 0
         self.committed_target_info: Optional[UtilityScore] = None
+        self.pruning_stats = tf.PruningStats()
+
+    def fallback_target(
+        self, board_bot: models.GameObject, board: models.Board
+    ) -> Optional[models.Position]:
+        if self.committed_target_info is not None:
+            return self.committed_target_info.immediate_target_pos
+        return super().fallback_target(board_bot, board)
+
+    def speculation_clock(
+        self, board_bot: models.GameObject, board: models.Board
+    ) -> bool:
+        # Only the diamond button's low-time penalty reads the clock
+        properties = board_bot.properties
+        milliseconds_left = properties.milliseconds_left if properties else None
+        return bool(
+            milliseconds_left
+            and milliseconds_left < BotConfig.MIN_TIME_FOR_RESET_BENEFIT_MS
+        )
 
     def _is_stuck(self, current_position: models.Position) -> bool:
         if self.last_position and position_equals(self.last_position, current_position):
@@ -49,8 +71,16 @@ class NazarickNPC(BaseLogic):
             self.committed_target_info = None
             return mv.get_random_valid_move(current_pos, board)
 
-        best_utility_score = tf.find_best_actionable_target(
-            board_bot, board, self.config.WEIGHTS, self.committed_target_info
+        oracle = oracle_for(board)
+        oracle.pin(properties.base)
+        best_utility_score = tf.find_best_actionable_target_pruned(
+            board_bot,
+            board,
+            self.weights,
+            self.committed_target_info,
+            self.pruning_stats,
+            oracle,
+            self.should_stop,
         )
 
         if not best_utility_score:
@@ -65,7 +95,7 @@ class NazarickNPC(BaseLogic):
             return (0, 0)
 
         move_dx, move_dy = mv.calculate_next_step(
-            current_pos, best_immediate_target_pos, board
+            current_pos, best_immediate_target_pos, board, oracle
         )
 
         return move_dx, move_dy
@@ -0,0 +1,179 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from game.distance import UNREACHABLE, DistanceOracle, oracle_for
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.util import position_equals
+
+
+@dataclass
+class Plan:
+    # Diamond ids in pickup order; the route always ends at base
+    stops: Tuple[int, ...]
+    steps: float
+    points: int
+    score: float = field(init=False)
+
+    def __post_init__(self):
+        self.score = self.points / self.steps if self.steps else 0.0
+
+
+class RoutePlanner(BaseLogic):
+    """
+    Plans whole trips: a sequence of diamonds that fits in the inventory
+    followed by the walk back to base, scored as points delivered per step.
+
+    The search is a beam search over the nearest diamonds, cut off by a
+    wall-clock budget per tick; the best plan found so far is always used, and
+    the previous tick's plan (minus what was picked up) seeds the next search.
+    """
+
+    # Other bots are never looked at, the clock only through speculation_clock
+    speculation_radius = 0
+
+    def __init__(
+        self,
+        time_budget: float = 0.05,
+        beam_width: int = 24,
+        max_candidates: int = 10,
+        ms_per_step: Optional[int] = None,
+    ):
+        self.time_budget = time_budget
+        self.beam_width = beam_width
+        self.max_candidates = max_candidates
+        # Game time a step takes; None follows the board's minimum move delay,
+        # which main.py paces its moves by
+        self.ms_per_step = ms_per_step
+        self.plan: Optional[Plan] = None
+        self.timed_out = 0
+
+    def _route_steps(
+        self,
+        oracle: DistanceOracle,
+        start: Position,
+        stops: Tuple[int, ...],
+        diamonds: Dict[int, GameObject],
+        base: Position,
+    ) -> float:
+        steps = 0
+        position = start
+        for stop in stops:
+            target = diamonds[stop].position
+            steps += oracle.distance(position, target)
+            position = target
+        return steps + oracle.distance(base, position)
+
+    def _steps_left(self, board_bot: GameObject, board: Board) -> int:
+        props = board_bot.properties
+        if props.milliseconds_left is None:
+            return UNREACHABLE
+        ms_per_step = max(1, self.ms_per_step or board.minimum_delay_between_moves)
+        return props.milliseconds_left // ms_per_step
+
+    def speculation_clock(self, board_bot: GameObject, board: Board) -> int:
+        # No plan is longer than one trip per diamond that fits, plus the way
+        # back, each at most a corner-to-corner walk; more steps left than
+        # that can't change the search
+        inventory_size = board_bot.properties.inventory_size or 5
+        longest = (inventory_size + 1) * (board.width + board.height)
+        return min(self._steps_left(board_bot, board), longest)
+
+    def search(
+        self,
+        board_bot: GameObject,
+        board: Board,
+        oracle: DistanceOracle,
+        deadline: float,
+    ) -> Plan:
+        props = board_bot.properties
+        base = props.base
+        carried = props.diamonds or 0
+        space = (props.inventory_size or 5) - carried
+        steps_left = self._steps_left(board_bot, board)
+        start = board_bot.position
+        diamonds = {d.id: d for d in board.diamonds}
+
+        best = Plan((), oracle.distance(base, start), carried)
+
+        def consider(plan: Plan) -> None:
+            nonlocal best
+            if plan.steps <= steps_left and plan.score > best.score:
+                best = plan
+
+        if space <= 0 or not diamonds:
+            return best
+
+        # Warm start: what is left of last tick's plan, if it still fits the bag
+        if self.plan:
+            remaining = tuple(stop for stop in self.plan.stops if stop in diamonds)
+            value = sum(diamonds[stop].properties.points or 1 for stop in remaining)
+            if remaining and value <= space:
+                consider(
+                    Plan(
+                        remaining,
+                        self._route_steps(oracle, start, remaining, diamonds, base),
+                        carried + value,
+                    )
+                )
+
+        candidates = sorted(
+            diamonds.values(), key=lambda d: oracle.distance(start, d.position)
+        )[: self.max_candidates]
+
+        # Beam entries: (stops, position, steps so far, points, space left)
+        beam = [((), start, 0, carried, space)]
+        while beam:
+            expanded = []
+            for stops, position, steps, points, room in beam:
+                for diamond in candidates:
+                    value = diamond.properties.points or 1
+                    if diamond.id in stops or value > room:
+                        continue
+                    leg = steps + oracle.distance(position, diamond.position)
+                    if leg >= steps_left:
+                        continue
+                    route = stops + (diamond.id,)
+                    total = leg + oracle.distance(base, diamond.position)
+                    consider(Plan(route, total, points + value))
+                    expanded.append(
+                        (route, diamond.position, leg, points + value, room - value)
+                    )
+                if time.perf_counter() >= deadline:
+                    self.timed_out += 1
+                    return best
+            expanded.sort(key=lambda entry: entry[3] / max(entry[2], 1), reverse=True)
+            beam = expanded[: self.beam_width]
+        return best
+
+    def fallback_target(
+        self, board_bot: GameObject, board: Board
+    ) -> Optional[Position]:
+        if self.plan and self.plan.stops:
+            diamond = board.get_object(self.plan.stops[0])
+            if diamond is not None:
+                return diamond.position
+        return super().fallback_target(board_bot, board)
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        deadline = time.perf_counter() + self.time_budget
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+        props = board_bot.properties
+        oracle = oracle_for(board)
+        oracle.pin(props.base)
+
+        self.plan = self.search(board_bot, board, oracle, deadline)
+        current = board_bot.position
+        if self.plan.stops:
+            target = board.get_object(self.plan.stops[0]).position
+        elif props.diamonds:
+            target = props.base
+        else:
+            buttons = board.diamond_buttons
+            target = buttons[0].position if buttons else props.base
+
+        if position_equals(current, target):
+            return (0, 0)
+        return oracle.next_step(current, target)
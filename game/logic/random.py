@@ -3,15 +3,21 @@ from typing import Optional
 
 from game.logic.base import BaseLogic
 from game.models import GameObject, Board, Position
-from ..util import get_direction
+from game.distance import oracle_for
 
 
 class RandomLogic(BaseLogic):
+    # Other bots and the clocks are never looked at
+    speculation_radius = 0
+
     def __init__(self):
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
         self.goal_position: Optional[Position] = None
         self.current_direction = 0
 
+    def speculation_clock(self, board_bot: GameObject, board: Board):
+        return None
+
     def next_move(self, board_bot: GameObject, board: Board):
         props = board_bot.properties
         # Analyze new state
@@ -25,13 +31,10 @@ class RandomLogic(BaseLogic):
 
         current_position = board_bot.position
         if self.goal_position:
-            # We are aiming for a specific position, calculate delta
-            delta_x, delta_y = get_direction(
-                current_position.x,
-                current_position.y,
-                self.goal_position.x,
-                self.goal_position.y,
-            )
+            # We are aiming for a specific position, take a shortest path step
+            oracle = oracle_for(board)
+            oracle.pin(self.goal_position)
+            delta_x, delta_y = oracle.next_step(current_position, self.goal_position)
         else:
             # Roam around
             delta = self.directions[self.current_direction]
@@ -1,6 +1,23 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-from colorama import Fore, Style
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from game.log import get_logger
+
+T = TypeVar("T")
+
+_moves_log = get_logger("moves")
 
 
 @dataclass
@@ -59,6 +76,32 @@ class Feature:
     config: Optional[Config] = None
 
 
+@dataclass
+class BoardChanges:
+    """
+    What changed on a board since the previous tick, as object ids
+    """
+
+    version: int
+    previous_version: Optional[int] = None
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    moved: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+    # Object types touched by any of the lists above
+    types: Set[str] = field(default_factory=set)
+
+    @property
+    def full(self) -> bool:
+        """
+        True when there is no previous tick to diff against
+        """
+        return self.previous_version is None
+
+    def touches(self, type_name: str) -> bool:
+        return self.full or type_name in self.types
+
+
 @dataclass
 class Board:
     id: int
@@ -68,49 +111,252 @@ class Board:
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
 
+    # Lookup tables built lazily in one pass over game_objects, see _indexes()
+    _objects_by_type: Optional[Dict[str, List[GameObject]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _bots_by_name: Optional[Dict[str, GameObject]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _objects_by_id: Optional[Dict[int, GameObject]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Set by BoardState when the board was diffed against the previous tick
+    changes: Optional[BoardChanges] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _indexes(self) -> Dict[str, List[GameObject]]:
+        if self._objects_by_type is None:
+            by_type: Dict[str, List[GameObject]] = {}
+            by_name: Dict[str, GameObject] = {}
+            by_id: Dict[int, GameObject] = {}
+            for obj in self.game_objects or []:
+                by_type.setdefault(obj.type, []).append(obj)
+                by_id.setdefault(obj.id, obj)
+                if obj.type == "BotGameObject" and obj.properties:
+                    by_name.setdefault(obj.properties.name, obj)
+            self._bots_by_name = by_name
+            self._objects_by_id = by_id
+            self._objects_by_type = by_type
+        return self._objects_by_type
+
+    def invalidate_indexes(self) -> None:
+        """
+        Must be called after game_objects is changed in place
+        """
+        self._objects_by_type = None
+        self._bots_by_name = None
+        self._objects_by_id = None
+
+    def objects_of_type(self, type_name: str) -> List[GameObject]:
+        return self._indexes().get(type_name, [])
+
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.objects_of_type("BotGameObject")
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.objects_of_type("DiamondGameObject")
+
+    @property
+    def teleporters(self) -> List[GameObject]:
+        return self.objects_of_type("TeleportGameObject")
+
+    @property
+    def diamond_buttons(self) -> List[GameObject]:
+        return self.objects_of_type("DiamondButtonGameObject")
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
+        self._indexes()
+        return self._bots_by_name.get(bot.name)
+
+    def get_object(self, object_id: int) -> Optional[GameObject]:
+        self._indexes()
+        return self._objects_by_id.get(object_id)
+
+    def move_error(
+        self, current_position: Position, delta_x: int, delta_y: int
+    ) -> Optional[str]:
+        """
+        Why a move would be rejected, or None if it is valid. Silent, so
+        controllers can probe as many moves as they like
+        """
+        if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
+            return "Delta values must be between -1 and 1 inclusive"
+
+        if delta_x == delta_y:
+            return "Delta_x and delta_y cannot be equal"
+
+        if not (0 <= current_position.x + delta_x < self.width):
+            return "X-coordinate out of bounds"
+
+        if not (0 <= current_position.y + delta_y < self.height):
+            return "Y-coordinate out of bounds"
+
         return None
 
+    def can_move(self, current_position: Position, delta_x: int, delta_y: int) -> bool:
+        return self.move_error(current_position, delta_x, delta_y) is None
+
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
-        if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
+        error = self.move_error(current_position, delta_x, delta_y)
+        if error is not None:
+            _moves_log.warning("Invalid move: %s", error)
             return False
+        return True
 
-        if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
-            return False
 
-        if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
+###############################################################################
+#
+# Schema-compiled decoding of server payloads into the models above
+#
+###############################################################################
+class SchemaError(ValueError):
+    """
+    Raised when a payload no longer matches the models (missing field, wrong type)
+    """
+
+    def __init__(self, message: str, path: str = ""):
+        self.message = message
+        self.path = path
+        super().__init__("{}: {}".format(path, message) if path else message)
+
+    def nested(self, segment: str) -> "SchemaError":
+        if not self.path or self.path.startswith("["):
+            return SchemaError(self.message, segment + self.path)
+        return SchemaError(self.message, segment + "." + self.path)
+
+
+_Converter = Callable[[Any], Any]
+_DECODERS: Dict[type, _Converter] = {}
+
+
+def _primitive_converter(expected: type) -> _Converter:
+    # isinstance checks, as in dacite: bool (an int subclass) is accepted for
+    # int and float, ints are fine where floats are expected
+    accepted = (int, float) if expected is float else (expected,)
+
+    def convert(value):
+        if not isinstance(value, accepted):
+            raise SchemaError(
+                "expected {}, got {}".format(expected.__name__, type(value).__name__)
             )
-            return False
+        return value
 
-        if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
+    return convert
+
+
+def _converter_for(hint: Any) -> Optional[_Converter]:
+    """
+    Build the converter for a type hint once; None means "use the value as is"
+    """
+    origin = get_origin(hint)
+    if origin is Union:
+        options = [arg for arg in get_args(hint) if arg is not type(None)]
+        if len(options) != 1:
+            raise TypeError("Unsupported union type: {}".format(hint))
+        inner = _converter_for(options[0])
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+
+    if origin in (list, List):
+        (item_hint,) = get_args(hint)
+        item = _converter_for(item_hint)
+
+        def convert_list(value):
+            if not isinstance(value, list):
+                raise SchemaError("expected list, got {}".format(type(value).__name__))
+            if item is None:
+                return list(value)
+            index = 0
+            try:
+                items = []
+                for index, element in enumerate(value):
+                    items.append(item(element))
+                return items
+            except SchemaError as e:
+                raise e.nested("[{}]".format(index)) from None
+
+        return convert_list
+
+    if is_dataclass(hint):
+        return compile_decoder(hint)
+    if hint in (int, float, str, bool):
+        return _primitive_converter(hint)
+    if hint is Any:
+        return None
+    raise TypeError("Unsupported field type: {}".format(hint))
+
+
+def compile_decoder(data_class: Type[T]) -> Callable[[dict], T]:
+    """
+    Build (once) a function turning a decoded payload dict into data_class.
+    Type hints are resolved here instead of on every call, unknown keys are
+    ignored and any mismatch raises SchemaError with the offending path.
+    """
+    if data_class in _DECODERS:
+        return _DECODERS[data_class]
+
+    hints = get_type_hints(data_class)
+    plan = []
+
+    def decode_object(data):
+        if not isinstance(data, dict):
+            raise SchemaError(
+                "expected object for {}, got {}".format(
+                    data_class.__name__, type(data).__name__
+                )
             )
-            return False
+        kwargs = {}
+        for name, convert, required, optional, none_default in plan:
+            if name in data:
+                value = data[name]
+                if value is None:
+                    if not optional:
+                        raise SchemaError("field is null", name)
+                    kwargs[name] = None
+                elif convert is None:
+                    kwargs[name] = value
+                else:
+                    try:
+                        kwargs[name] = convert(value)
+                    except SchemaError as e:
+                        raise e.nested(name) from None
+            elif required:
+                raise SchemaError(
+                    "missing field for {}".format(data_class.__name__), name
+                )
+            elif none_default:
+                kwargs[name] = None
+        try:
+            return data_class(**kwargs)
+        except TypeError as e:
+            raise SchemaError(
+                "cannot build {} ({})".format(data_class.__name__, e)
+            ) from None
 
-        return True
+    # Registered before the fields are compiled so self-referencing models resolve
+    _DECODERS[data_class] = decode_object
+    for f in fields(data_class):
+        if not f.init:
+            continue
+        hint = hints[f.name]
+        optional = get_origin(hint) is Union and type(None) in get_args(hint)
+        has_default = f.default is not MISSING or f.default_factory is not MISSING
+        required = not optional and not has_default
+        # Optional fields without a default are None when missing, as with dacite
+        none_default = optional and not has_default
+        plan.append((f.name, _converter_for(hint), required, optional, none_default))
+    return decode_object
+
+
+def from_dict(data_class: Type[T], data: dict) -> T:
+    """
+    Drop-in replacement for dacite.from_dict backed by compile_decoder
+    """
+    return compile_decoder(data_class)(data)
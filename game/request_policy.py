@@ -0,0 +1,91 @@
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# requests' advice: slightly above a multiple of 3s, the TCP retransmit window
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 5.0
+
+
+@dataclass
+class EndpointPolicy:
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    # Extra attempts after a timeout, connection error or 5xx; only ever
+    # applied to idempotent GETs
+    retries: int = 0
+    # Base of the exponential backoff in seconds, with full jitter
+    backoff: float = 0.05
+    # Send a second identical GET when the first has not answered after this
+    # many seconds, and use whichever answers first
+    hedge_after: Optional[float] = None
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * (2**attempt))
+
+
+@dataclass
+class RequestPolicy:
+    """
+    Timeouts, retries and hedging per Api operation (bots_get, boards_get, ...)
+    """
+
+    default: EndpointPolicy = field(default_factory=EndpointPolicy)
+    operations: Dict[str, EndpointPolicy] = field(default_factory=dict)
+
+    def for_operation(self, operation: str) -> EndpointPolicy:
+        return self.operations.get(operation, self.default)
+
+
+def default_policy(
+    read_timeout: float = DEFAULT_READ_TIMEOUT, hedge_after: Optional[float] = None
+) -> RequestPolicy:
+    """
+    Game calls get a short read timeout; board and bot reads are retried,
+    board reads may be hedged. Moves are never retried, as a retry could move
+    twice.
+    """
+    return RequestPolicy(
+        default=EndpointPolicy(read_timeout=read_timeout),
+        operations={
+            "boards_get": EndpointPolicy(
+                read_timeout=read_timeout, retries=2, hedge_after=hedge_after
+            ),
+            "bots_get": EndpointPolicy(read_timeout=read_timeout, retries=2),
+        },
+    )
+
+
+class RequestStats:
+    """
+    Outcome counters per operation: ok, status_<code>, timeout, error,
+    retried, hedged and hedge_won (the second request answered first)
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, Counter] = {}
+
+    def count(self, operation: str, outcome: str) -> None:
+        counter = self.counts.get(operation)
+        if counter is None:
+            counter = self.counts[operation] = Counter()
+        counter[outcome] += 1
+
+    def summary(self) -> str:
+        lines = []
+        for operation, counter in sorted(self.counts.items()):
+            lines.append(
+                "{:<14} {}".format(
+                    operation,
+                    "  ".join(
+                        "{} {}".format(outcome, n)
+                        for outcome, n in sorted(counter.items())
+                    ),
+                )
+            )
+        return "\n".join(lines)
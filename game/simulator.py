@@ -0,0 +1,300 @@
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import (
+    Base,
+    Board,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+_TIME_JOINED = "1970-01-01T00:00:00.000Z"
+
+
+@dataclass
+class SimulatorConfig:
+    width: int = 15
+    height: int = 15
+    inventory_size: int = 5
+    can_tackle: bool = True
+    game_ms: int = 60000
+    # Time a bot's clock loses per move; None is minimum_delay_between_moves,
+    # the pace main.py keeps with the default --time-factor
+    ms_per_move: Optional[int] = None
+    minimum_delay_between_moves: int = 100
+    teleporter_pairs: int = 1
+    teleporter_relocation_ms: int = 10000
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.01
+    red_ratio: float = 0.2
+
+    @property
+    def move_ms(self) -> int:
+        return self.ms_per_move or self.minimum_delay_between_moves
+
+
+class GameSimulator:
+    """
+    Headless, in-process implementation of the Diamonds rules: movement,
+    diamond pickup and respawn, the diamond button, teleporters, tackling,
+    bases and each bot's game timer. Controllers see the same models.Board /
+    GameObject structures the server sends, and a game runs as fast as the
+    controllers can decide.
+    """
+
+    def __init__(
+        self, config: Optional[SimulatorConfig] = None, seed: Optional[int] = None
+    ):
+        self.config = config or SimulatorConfig()
+        self.rng = random.Random(seed)
+        self.next_id = 1
+        self.elapsed_ms = 0
+        self.controllers: Dict[str, BaseLogic] = {}
+        self.bots: Dict[str, GameObject] = {}
+        self.scores: Dict[str, int] = {}
+        self.board = Board(
+            id=1,
+            width=self.config.width,
+            height=self.config.height,
+            features=self._features(),
+            minimum_delay_between_moves=self.config.minimum_delay_between_moves,
+            game_objects=[],
+        )
+        for _ in range(self.config.teleporter_pairs):
+            self._add_teleporter_pair()
+        self._add("DiamondButtonGameObject", self._free_position(), Properties())
+        self._generate_diamonds()
+
+    def _features(self) -> List[Feature]:
+        config = self.config
+        return [
+            Feature(name="DiamondButtonProvider"),
+            Feature(
+                name="DiamondProvider",
+                config=Config(
+                    generation_ratio=config.generation_ratio,
+                    min_ratio_for_generation=config.min_ratio_for_generation,
+                    red_ratio=config.red_ratio,
+                ),
+            ),
+            Feature(
+                name="TeleportProvider", config=Config(pairs=config.teleporter_pairs)
+            ),
+            Feature(
+                name="BotProvider",
+                config=Config(
+                    inventory_size=config.inventory_size,
+                    can_tackle=config.can_tackle,
+                ),
+            ),
+            Feature(
+                name="TeleportRelocationProvider",
+                config=Config(seconds=config.teleporter_relocation_ms // 1000),
+            ),
+        ]
+
+    ###########################################################################
+    # Board bookkeeping
+    ###########################################################################
+    def _add(
+        self, type_name: str, position: Position, properties: Optional[Properties]
+    ) -> GameObject:
+        obj = GameObject(
+            id=self.next_id, position=position, type=type_name, properties=properties
+        )
+        self.next_id += 1
+        self.board.game_objects.append(obj)
+        self.board.invalidate_indexes()
+        return obj
+
+    def _remove(self, objects: List[GameObject]) -> None:
+        removed = {id(obj) for obj in objects}
+        self.board.game_objects = [
+            obj for obj in self.board.game_objects if id(obj) not in removed
+        ]
+        self.board.invalidate_indexes()
+
+    def _occupied(self) -> set:
+        return {(obj.position.x, obj.position.y) for obj in self.board.game_objects}
+
+    def _free_position(self, occupied: Optional[set] = None) -> Position:
+        occupied = self._occupied() if occupied is None else occupied
+        while True:
+            x = self.rng.randrange(self.config.width)
+            y = self.rng.randrange(self.config.height)
+            if (x, y) not in occupied:
+                occupied.add((x, y))
+                return Position(y=y, x=x)
+
+    def _objects_at(self, x: int, y: int) -> List[GameObject]:
+        return [
+            obj
+            for obj in self.board.game_objects
+            if obj.position.x == x and obj.position.y == y
+        ]
+
+    def _add_teleporter_pair(self) -> None:
+        first = self._add("TeleportGameObject", self._free_position(), Properties())
+        second = self._add("TeleportGameObject", self._free_position(), Properties())
+        first.properties.pair_id = str(second.id)
+        second.properties.pair_id = str(first.id)
+
+    def _relocate_teleporters(self) -> None:
+        occupied = self._occupied()
+        for obj in self.board.teleporters:
+            obj.position = self._free_position(occupied)
+        self.board.invalidate_indexes()
+
+    def _generate_diamonds(self) -> None:
+        cells = self.config.width * self.config.height
+        target = max(1, int(cells * self.config.generation_ratio))
+        occupied = self._occupied()
+        for _ in range(target - len(self.board.diamonds)):
+            points = 2 if self.rng.random() < self.config.red_ratio else 1
+            obj = GameObject(
+                id=self.next_id,
+                position=self._free_position(occupied),
+                type="DiamondGameObject",
+                properties=Properties(points=points),
+            )
+            self.next_id += 1
+            self.board.game_objects.append(obj)
+        self.board.invalidate_indexes()
+
+    def _respawn_diamonds_if_low(self) -> None:
+        cells = self.config.width * self.config.height
+        minimum = max(1, int(cells * self.config.min_ratio_for_generation))
+        if len(self.board.diamonds) < minimum:
+            self._generate_diamonds()
+
+    ###########################################################################
+    # Players
+    ###########################################################################
+    def add_bot(self, name: str, controller: BaseLogic) -> GameObject:
+        occupied = self._occupied()
+        base_position = self._free_position(occupied)
+        base = Base(y=base_position.y, x=base_position.x)
+        self._add("BaseGameObject", base_position, Properties(name=name))
+        bot = self._add(
+            "BotGameObject",
+            Position(y=base.y, x=base.x),
+            Properties(
+                diamonds=0,
+                score=0,
+                name=name,
+                inventory_size=self.config.inventory_size,
+                can_tackle=self.config.can_tackle,
+                milliseconds_left=self.config.game_ms,
+                time_joined=_TIME_JOINED,
+                base=base,
+            ),
+        )
+        self.controllers[name] = controller
+        self.bots[name] = bot
+        self.scores[name] = 0
+        return bot
+
+    def _send_home(self, bot: GameObject) -> None:
+        base = bot.properties.base
+        bot.position = Position(y=base.y, x=base.x)
+
+    def _tackle(self, bot: GameObject, victim: GameObject) -> None:
+        space = bot.properties.inventory_size - bot.properties.diamonds
+        bot.properties.diamonds += min(space, victim.properties.diamonds)
+        victim.properties.diamonds = 0
+        self._send_home(victim)
+
+    def move(self, bot: GameObject, delta_x: int, delta_y: int) -> bool:
+        """
+        Apply one move with the server's rules, returns False if it was ignored
+        """
+        if abs(delta_x) + abs(delta_y) != 1:
+            return False
+        x = bot.position.x + delta_x
+        y = bot.position.y + delta_y
+        if not (0 <= x < self.config.width and 0 <= y < self.config.height):
+            return False
+
+        props = bot.properties
+        target = self._objects_at(x, y)
+        for obj in target:
+            if obj.type == "BotGameObject" and obj is not bot:
+                if not props.can_tackle:
+                    return False
+                self._tackle(bot, obj)
+
+        bot.position = Position(y=y, x=x)
+        for obj in target:
+            if obj.type == "TeleportGameObject":
+                pair = self.board.get_object(int(obj.properties.pair_id))
+                if pair is not None:
+                    bot.position = Position(y=pair.position.y, x=pair.position.x)
+            elif obj.type == "DiamondGameObject":
+                if props.diamonds + obj.properties.points <= props.inventory_size:
+                    props.diamonds += obj.properties.points
+                    self._remove([obj])
+            elif obj.type == "DiamondButtonGameObject":
+                self._remove(self.board.diamonds)
+                obj.position = self._free_position()
+                self.board.invalidate_indexes()
+                self._generate_diamonds()
+
+        if bot.position.x == props.base.x and bot.position.y == props.base.y:
+            props.score += props.diamonds
+            props.diamonds = 0
+            self.scores[props.name] = props.score
+        self.board.invalidate_indexes()
+        self._respawn_diamonds_if_low()
+        return True
+
+    ###########################################################################
+    # Game loop
+    ###########################################################################
+    def step(self) -> bool:
+        """
+        Let every bot still in the game decide and move once, in random order.
+        Returns False once every bot's time is up.
+        """
+        names = list(self.bots)
+        self.rng.shuffle(names)
+        for name in names:
+            bot = self.bots[name]
+            delta_x, delta_y = self.controllers[name].next_move(bot, self.board)
+            self.move(bot, delta_x, delta_y)
+            bot.properties.milliseconds_left -= self.config.move_ms
+            if bot.properties.milliseconds_left <= 0:
+                del self.bots[name]
+                self._remove([bot])
+
+        self.elapsed_ms += self.config.move_ms
+        relocation = self.config.teleporter_relocation_ms
+        if relocation and self.elapsed_ms % relocation < self.config.move_ms:
+            self._relocate_teleporters()
+        return bool(self.bots)
+
+    def run(self, max_steps: Optional[int] = None) -> Dict[str, int]:
+        steps = 0
+        while self.step():
+            steps += 1
+            if max_steps is not None and steps >= max_steps:
+                break
+        return dict(self.scores)
+
+
+def play_game(
+    controllers: List[Tuple[str, BaseLogic]],
+    config: Optional[SimulatorConfig] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Play one full game and return the final score of every bot by name
+    """
+    simulator = GameSimulator(config, seed)
+    for name, controller in controllers:
+        simulator.add_bot(name, controller)
+    return simulator.run()
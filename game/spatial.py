@@ -0,0 +1,280 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from game.models import Board, GameObject, Position
+
+DIAMOND = "DiamondGameObject"
+TARGET_PER_BUCKET = 2
+# Below this many diamonds a plain scan beats walking the buckets
+SCAN_BELOW = 48
+
+# (steps spent before the shortcut is taken, cell the bot comes out on)
+Shortcut = Tuple[float, Position]
+_Entry = Tuple[int, GameObject, int, int, int]
+
+
+def _points(obj: GameObject) -> int:
+    if obj.properties and obj.properties.points:
+        return obj.properties.points
+    return 0
+
+
+def _bucket_size(diamonds: Sequence[GameObject]) -> int:
+    # Aim for a couple of diamonds per bucket over the area they are spread on
+    if not diamonds:
+        return 1
+    xs = [obj.position.x for obj in diamonds]
+    ys = [obj.position.y for obj in diamonds]
+    area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+    return max(1, round(math.sqrt(area * TARGET_PER_BUCKET / len(diamonds))))
+
+
+class DiamondIndex:
+    """
+    Diamonds bucketed on a coarse grid. Queries walk the buckets in rings
+    around the query cell, nearest ring first, and stop as soon as no diamond
+    further out can beat the best answer found so far, so answers are exactly
+    those of a scan over every diamond, ties included: the object earliest in
+    the source list wins.
+    """
+
+    def __init__(
+        self, diamonds: Sequence[GameObject], bucket_size: Optional[int] = None
+    ):
+        self.requested_bucket_size = bucket_size
+        self.bucket_size = bucket_size or _bucket_size(diamonds)
+        self.source = diamonds
+        # BoardChanges.version of the board the index was built from, if diffed
+        self.version: Optional[int] = None
+        # (position in the source list, object, x, y, points), in list order
+        self.entries: List[_Entry] = []
+        self.buckets: Dict[Tuple[int, int], List[_Entry]] = {}
+        self.by_cell: Dict[Tuple[int, int], GameObject] = {}
+        self.max_points = 0
+        self.max_key = (0, 0)
+        size = self.bucket_size
+        for order, obj in enumerate(diamonds):
+            x, y = obj.position.x, obj.position.y
+            points = _points(obj)
+            key = (x // size, y // size)
+            entries = self.buckets.get(key)
+            if entries is None:
+                entries = self.buckets[key] = []
+            entries.append((order, obj, x, y, points))
+            self.entries.append(entries[-1])
+            self.by_cell.setdefault((x, y), obj)
+            if points > self.max_points:
+                self.max_points = points
+        if self.buckets:
+            self.max_key = (
+                max(key[0] for key in self.buckets),
+                max(key[1] for key in self.buckets),
+            )
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def contains(self, position: Optional[Position]) -> bool:
+        return position is not None and (position.x, position.y) in self.by_cell
+
+    def at(self, position: Position) -> Optional[GameObject]:
+        return self.by_cell.get((position.x, position.y))
+
+    def _rings(
+        self, position: Position, spent: float = 0
+    ) -> Iterator[Tuple[float, int, List[List[_Entry]]]]:
+        """
+        (fewest steps to any cell of the ring, ring number, entries of every
+        non-empty bucket of the ring) for every ring of buckets around position.
+        A small index is a single ring holding every entry
+        """
+        if len(self.entries) < SCAN_BELOW:
+            yield spent, 0, [self.entries]
+            return
+        size = self.bucket_size
+        max_kx, max_ky = self.max_key
+        # Cells outside the board still have a bucket to start the rings from
+        cx = min(max(position.x // size, -1), max_kx + 1)
+        cy = min(max(position.y // size, -1), max_ky + 1)
+        last = max(cx + 1, max_kx - cx, cy + 1, max_ky - cy)
+        buckets = self.buckets
+        for ring in range(last + 1):
+            x0, x1, y0, y1 = cx - ring, cx + ring, cy - ring, cy + ring
+            if ring == 0:
+                keys = [(cx, cy)]
+            else:
+                keys = [(x, y0) for x in range(x0, x1 + 1)]
+                keys += [(x, y1) for x in range(x0, x1 + 1)]
+                keys += [(x0, y) for y in range(y0 + 1, y1)]
+                keys += [(x1, y) for y in range(y0 + 1, y1)]
+            # A bucket `ring` buckets away is at least (ring - 1) * size + 1 steps
+            # away along one axis
+            steps = spent + max(0, (ring - 1) * size + 1)
+            yield steps, ring, [buckets[key] for key in keys if key in buckets]
+
+    def nearest(self, position: Position, k: int = 1) -> List[GameObject]:
+        """
+        The k diamonds fewest grid steps from position, closest first
+        """
+        found: List[Tuple[int, int, GameObject]] = []
+        px, py = position.x, position.y
+        for bound, _, groups in self._rings(position):
+            if len(found) >= k and bound > found[k - 1][0]:
+                break
+            for entries in groups:
+                for order, obj, x, y, _ in entries:
+                    found.append((abs(x - px) + abs(y - py), order, obj))
+            found.sort(key=lambda item: item[:2])
+            del found[k:]
+        return [obj for _, _, obj in found]
+
+    def within(self, position: Position, radius: int) -> List[GameObject]:
+        """
+        Diamonds at most radius grid steps from position, in list order
+        """
+        found: List[Tuple[int, GameObject]] = []
+        px, py = position.x, position.y
+        for bound, _, groups in self._rings(position):
+            if bound > radius:
+                break
+            for entries in groups:
+                for order, obj, x, y, _ in entries:
+                    if abs(x - px) + abs(y - py) <= radius:
+                        found.append((order, obj))
+        found.sort(key=lambda item: item[0])
+        return [obj for _, obj in found]
+
+    def best_density(
+        self,
+        origin: Position,
+        offset: float = 0,
+        distance: Optional[Callable[[Position, Position], float]] = None,
+        shortcuts: Sequence[Shortcut] = (),
+        radius: Optional[int] = None,
+        floor: float = 0.0,
+    ) -> Tuple[float, Optional[GameObject]]:
+        """
+        The diamond with the most points per step, where the steps to a
+        diamond are offset + distance(origin, diamond.position)
+
+        :param distance: step count to use instead of the grid distance. It may
+        be shorter than the grid distance only through the given shortcuts
+        :param shortcuts: ways around the grid, such as entering the nearest
+        teleporter and coming out of any teleporter: the steps a route through
+        one can take are at least spent + grid steps from its exit
+        :param radius: ignore diamonds more than radius grid steps from origin
+        :param floor: only a density above floor is an answer
+        :return: (density, diamond), or (floor, None) without an answer.
+        Diamonds without points have density 0, diamonds zero steps away inf
+        """
+        best_density = floor
+        best_order = len(self.source)
+        best: Optional[GameObject] = None
+        max_points = self.max_points
+        ox, oy = origin.x, origin.y
+        # Rings around the origin and around every shortcut exit, merged so
+        # buckets come up in order of the fewest steps they can be reached in
+        sources = [self._rings(origin)]
+        if len(self.entries) >= SCAN_BELOW:
+            sources += [
+                self._rings(exit_position, spent) for spent, exit_position in shortcuts
+            ]
+        rings = sources[0]
+        if len(sources) > 1:
+            rings = heapq.merge(*sources, key=lambda ring: ring[0])
+        seen = set()
+        for steps, _, groups in rings:
+            if radius is not None and not shortcuts and steps > radius:
+                break
+            steps += offset
+            if max_points <= 0:
+                bound = 0.0
+            elif steps <= 0:
+                bound = float("inf")
+            else:
+                bound = max_points / steps
+            # An equal density only wins from earlier in the list
+            if bound < best_density or (bound == best_density and best is None):
+                break
+            for entries in groups:
+                if id(entries) in seen:
+                    continue
+                seen.add(id(entries))
+                for order, obj, x, y, points in entries:
+                    if radius is not None and abs(x - ox) + abs(y - oy) > radius:
+                        continue
+                    if points <= 0:
+                        density = 0.0
+                    else:
+                        if distance is None:
+                            steps = abs(x - ox) + abs(y - oy) + offset
+                        else:
+                            steps = distance(origin, obj.position) + offset
+                        density = points / steps if steps > 0 else float("inf")
+                    if density > best_density or (
+                        best is not None
+                        and density == best_density
+                        and order < best_order
+                    ):
+                        best_density, best_order, best = density, order, obj
+        return best_density, best
+
+    def update(self, board: Board) -> bool:
+        """
+        Sync with the board of this tick, returns True if the index was rebuilt
+        """
+        diamonds = board.diamonds
+        if diamonds is self.source:
+            return False
+        changes = board.changes
+        if (
+            changes is not None
+            and self.version is not None
+            and changes.previous_version == self.version
+            and not changes.touches(DIAMOND)
+        ):
+            # BoardState kept the very same diamond objects
+            self.version = changes.version
+            self.source = diamonds
+            return False
+        self.__init__(diamonds, self.requested_bucket_size)
+        self.version = changes.version if changes is not None else None
+        return True
+
+
+_INDEXES: Dict[int, DiamondIndex] = {}
+
+
+def index_for(board: Board) -> Optional[DiamondIndex]:
+    """
+    The diamond index shared by every controller in this process playing on
+    board, or None if board was not diffed by BoardState: a fresh board every
+    tick would rebuild the index every tick, which costs more than the scans it
+    replaces, so callers scan the diamonds instead
+    """
+    if board.changes is None:
+        return None
+    index = _INDEXES.get(board.id)
+    if index is None:
+        index = _INDEXES[board.id] = DiamondIndex(board.diamonds)
+        index.version = board.changes.version
+    else:
+        index.update(board)
+    return index
+
+
+def teleporter_shortcuts(
+    origin: Position, teleporters: Sequence[GameObject]
+) -> List[Shortcut]:
+    """
+    Shortcuts for DiamondIndex.best_density on a board with teleporters: any
+    route through them first walks to one, then leaves from one
+    """
+    if not teleporters:
+        return []
+    spent = min(
+        abs(obj.position.x - origin.x) + abs(obj.position.y - origin.y)
+        for obj in teleporters
+    )
+    return [(spent, obj.position) for obj in teleporters]
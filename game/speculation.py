@@ -0,0 +1,127 @@
+from dataclasses import dataclass, replace
+from typing import Any, Optional, Tuple
+
+from game.models import Board, GameObject, Position
+
+
+@dataclass
+class SpeculationStats:
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+
+    def summary(self) -> str:
+        guessed = self.hits + self.misses
+        return "speculation: {} hits, {} misses, {} not predicted ({:.0%} hit rate)".format(
+            self.hits,
+            self.misses,
+            self.skipped,
+            self.hits / guessed if guessed else 0,
+        )
+
+
+def predict_board(
+    board: Board, board_bot: GameObject, delta_x: int, delta_y: int, elapsed_ms: int = 0
+) -> Optional[Board]:
+    """
+    Board after our own move, assuming nobody else moves meanwhile. Follows the
+    server rules replayed by GameSimulator.move: teleport on entering a
+    teleporter, pick up a diamond on the entered cell if it fits, deposit at
+    base. Returns None when the outcome can't be predicted (tackling a bot,
+    pressing the diamond button regenerates diamonds at random).
+    :param board: Board the move was decided on, left untouched
+    :param board_bot: our bot on that board
+    :param elapsed_ms: expected time until the server answers
+    :return: Optional[Board]
+    """
+    x = board_bot.position.x + delta_x
+    y = board_bot.position.y + delta_y
+    if not (0 <= x < board.width and 0 <= y < board.height):
+        return None
+
+    props = board_bot.properties
+    entered = [
+        obj for obj in board.game_objects if obj.position.x == x and obj.position.y == y
+    ]
+    objects = []
+    landing = Position(y=y, x=x)
+    diamonds = props.diamonds
+    picked = None
+    for obj in entered:
+        if obj.type == "BotGameObject" or obj.type == "DiamondButtonGameObject":
+            return None
+        if obj.type == "TeleportGameObject":
+            pair = board.get_object(int(obj.properties.pair_id))
+            if pair is not None:
+                landing = Position(y=pair.position.y, x=pair.position.x)
+        elif obj.type == "DiamondGameObject":
+            if diamonds + obj.properties.points <= props.inventory_size:
+                diamonds += obj.properties.points
+                picked = obj
+
+    score = props.score
+    if landing.x == props.base.x and landing.y == props.base.y:
+        score += diamonds
+        diamonds = 0
+    milliseconds_left = props.milliseconds_left
+    if milliseconds_left is not None:
+        milliseconds_left = max(0, milliseconds_left - elapsed_ms)
+    moved = replace(
+        board_bot,
+        position=landing,
+        properties=replace(
+            props, diamonds=diamonds, score=score, milliseconds_left=milliseconds_left
+        ),
+    )
+
+    for obj in board.game_objects:
+        if obj is board_bot:
+            objects.append(moved)
+        elif obj is not picked:
+            objects.append(obj)
+    return Board(
+        id=board.id,
+        width=board.width,
+        height=board.height,
+        features=board.features,
+        minimum_delay_between_moves=board.minimum_delay_between_moves,
+        game_objects=objects,
+    )
+
+
+def board_signature(
+    board: Board, board_bot: GameObject, radius: Optional[int] = None, clock: Any = None
+) -> Tuple:
+    """
+    What a controller reads from a board: our own bot, the diamonds,
+    teleporters and diamond buttons, the other bots within radius steps of
+    ours and what it makes of the clocks. A move decided on a predicted board
+    is reused when the real board has the same signature, so other bots moving
+    out of reach don't make the prediction miss
+    :param radius: BaseLogic.speculation_radius, None for every bot
+    :param clock: BaseLogic.speculation_clock on the same board
+    """
+    x, y = board_bot.position.x, board_bot.position.y
+    signature = []
+    for obj in board.game_objects or []:
+        props = obj.properties
+        if obj.type == "BotGameObject" and obj.id != board_bot.id:
+            if radius is not None and (
+                abs(obj.position.x - x) + abs(obj.position.y - y) > radius
+            ):
+                continue
+        signature.append(
+            (
+                obj.id,
+                obj.type,
+                obj.position.x,
+                obj.position.y,
+                props.points if props else None,
+                props.diamonds if props else None,
+                props.score if props else None,
+                props.pair_id if props else None,
+                props.can_tackle if props else None,
+            )
+        )
+    signature.sort(key=lambda entry: (entry[0], entry[1]))
+    return clock, tuple(signature)
@@ -0,0 +1,171 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import monotonic, perf_counter_ns, sleep
+from typing import Dict, Iterator, List, Optional
+
+# Upper bounds of the histogram buckets, in microseconds; one overflow bucket
+# follows the last bound
+BUCKET_BOUNDS_US = (
+    50,
+    100,
+    250,
+    500,
+    1_000,
+    2_500,
+    5_000,
+    10_000,
+    25_000,
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    2_500_000,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram: recording is a bisect and an increment
+    """
+
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, elapsed_us: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS_US, elapsed_us)] += 1
+        self.count += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket holding the given fraction of samples
+        """
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                if index < len(BUCKET_BOUNDS_US):
+                    return min(float(BUCKET_BOUNDS_US[index]), self.max_us)
+                return self.max_us
+        return self.max_us
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+
+class Timings:
+    """
+    Named phase histograms fed by monotonic-clock spans
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.phases: Dict[str, Histogram] = {}
+
+    def record(self, phase: str, elapsed_ns: int) -> None:
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        histogram.record(elapsed_ns / 1000)
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(phase, perf_counter_ns() - start)
+
+    def summary(self, phases: Optional[List[str]] = None) -> str:
+        lines = [
+            "{:<12} {:>7} {:>11} {:>11} {:>11} {:>11}".format(
+                "phase", "count", "mean ms", "p50 ms", "p99 ms", "max ms"
+            )
+        ]
+        for phase in phases or list(self.phases):
+            histogram = self.phases.get(phase)
+            if not histogram:
+                continue
+            lines.append(
+                "{:<12} {:>7} {:>11.3f} {:>11.3f} {:>11.3f} {:>11.3f}".format(
+                    phase,
+                    histogram.count,
+                    histogram.mean_us / 1000,
+                    histogram.percentile(0.5) / 1000,
+                    histogram.percentile(0.99) / 1000,
+                    histogram.max_us / 1000,
+                )
+            )
+        return "\n".join(lines)
+
+
+# Shared by the Api, the handlers and the game loop of this process
+TIMINGS = Timings()
+
+
+class MovePacer:
+    """
+    Schedules each move at the last send time plus the board's minimum delay,
+    so time spent deciding is subtracted from the wait instead of added to it
+    """
+
+    def __init__(self, move_delay: float, time_factor: float = 1):
+        self.interval = move_delay * time_factor
+        self.last_send: Optional[float] = None
+        self.first_send: Optional[float] = None
+        self.moves = 0
+
+    def remaining(self) -> float:
+        """
+        Seconds left until the next move may be sent
+        """
+        if self.last_send is None:
+            return 0.0
+        return max(0.0, self.last_send + self.interval - monotonic())
+
+    def wait(self) -> None:
+        delay = self.remaining()
+        if delay > 0:
+            sleep(delay)
+
+    def sent(self) -> None:
+        """
+        Marks a move as sent now, starting the next deadline
+        """
+        self.last_send = monotonic()
+        if self.first_send is None:
+            self.first_send = self.last_send
+        self.moves += 1
+
+    @property
+    def moves_per_second(self) -> float:
+        if self.moves < 2:
+            return 0.0
+        return (self.moves - 1) / (self.last_send - self.first_send)
+
+    @property
+    def max_moves_per_second(self) -> float:
+        return 1 / self.interval if self.interval > 0 else float("inf")
+
+    def summary(self) -> str:
+        return "{} moves, {:.2f} moves/s of {:.2f} allowed ({:.0%})".format(
+            self.moves,
+            self.moves_per_second,
+            self.max_moves_per_second,
+            self.moves_per_second / self.max_moves_per_second,
+        )
@@ -0,0 +1,311 @@
+"""
+Compact append-only binary traces of live games, for offline replay.
+
+A trace is a header (MAGIC + version) followed by records, each a one-byte tag
+and varint-encoded fields. Strings (names, types, pair ids, timestamps and the
+features JSON) are written once in a STRING record and then referenced by
+index, so a board with a few dozen objects takes a few hundred bytes.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+from game.models import (
+    Base,
+    Board,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+    from_dict,
+)
+
+MAGIC = b"DTRC"
+VERSION = 1
+
+TAG_STRING = 1
+TAG_BOT = 2
+TAG_BOARD = 3
+TAG_MOVE = 4
+# Starts every recording session; string indexes restart after it, so several
+# sessions can be appended to the same file
+TAG_SESSION = 5
+
+# Bit 0 of the properties mask says whether the object has properties at all
+_INT_FIELDS = ("points", "diamonds", "score", "inventory_size", "milliseconds_left")
+_STR_FIELDS = ("pair_id", "name", "time_joined")
+_PROPERTY_FIELDS = _INT_FIELDS + _STR_FIELDS + ("can_tackle", "base")
+
+
+@dataclass
+class TraceBot:
+    name: str
+    id: str
+
+
+@dataclass
+class TraceBoard:
+    time_ms: int
+    board: Board
+
+
+@dataclass
+class TraceMove:
+    delta_x: int
+    delta_y: int
+    decide_us: int
+    request_us: int
+    accepted: bool
+
+
+TraceRecord = Union[TraceBot, TraceBoard, TraceMove]
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+class _Buffer:
+    def __init__(self):
+        self.data = bytearray()
+
+    def uint(self, value: int) -> None:
+        while value > 0x7F:
+            self.data.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def int(self, value: int) -> None:
+        self.uint(_zigzag(value))
+
+
+class TraceWriter:
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.strings: Dict[str, int] = {}
+        self.start_ms: Optional[int] = None
+        if stream.tell() == 0:
+            stream.write(MAGIC + bytes([VERSION]))
+        stream.write(bytes([TAG_SESSION]))
+
+    @classmethod
+    def open(cls, path: str) -> "TraceWriter":
+        return cls(open(path, "ab"))
+
+    def close(self) -> None:
+        self.stream.close()
+
+    def _string(self, out: _Buffer, value: str) -> None:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+            encoded = value.encode()
+            record = _Buffer()
+            record.data.append(TAG_STRING)
+            record.uint(len(encoded))
+            record.data += encoded
+            self.stream.write(record.data)
+        out.uint(index)
+
+    def write_bot(self, name: str, bot_id: str) -> None:
+        out = _Buffer()
+        out.data.append(TAG_BOT)
+        self._string(out, name)
+        self._string(out, bot_id)
+        self.stream.write(out.data)
+
+    def write_board(self, board: Board, time_ms: int) -> None:
+        if self.start_ms is None:
+            self.start_ms = time_ms
+        out = _Buffer()
+        out.data.append(TAG_BOARD)
+        out.uint(time_ms - self.start_ms)
+        out.uint(board.id)
+        out.uint(board.width)
+        out.uint(board.height)
+        out.uint(board.minimum_delay_between_moves)
+        self._string(
+            out,
+            json.dumps([asdict(f) for f in board.features], separators=(",", ":")),
+        )
+        game_objects = board.game_objects
+        if game_objects is None:
+            out.uint(0)
+        else:
+            out.uint(len(game_objects) + 1)
+            for obj in game_objects:
+                self._object(out, obj)
+        self.stream.write(out.data)
+
+    def _object(self, out: _Buffer, obj: GameObject) -> None:
+        out.int(obj.id)
+        self._string(out, obj.type)
+        out.uint(obj.position.x)
+        out.uint(obj.position.y)
+        props = obj.properties
+        if props is None:
+            out.uint(0)
+            return
+        mask = 1
+        for bit, name in enumerate(_PROPERTY_FIELDS, 1):
+            if getattr(props, name) is not None:
+                mask |= 1 << bit
+        out.uint(mask)
+        for name in _INT_FIELDS:
+            if getattr(props, name) is not None:
+                out.int(getattr(props, name))
+        for name in _STR_FIELDS:
+            if getattr(props, name) is not None:
+                self._string(out, getattr(props, name))
+        if props.can_tackle is not None:
+            out.uint(int(props.can_tackle))
+        if props.base is not None:
+            out.uint(props.base.x)
+            out.uint(props.base.y)
+
+    def write_move(
+        self,
+        delta_x: int,
+        delta_y: int,
+        decide_us: int,
+        request_us: int,
+        accepted: bool,
+    ) -> None:
+        out = _Buffer()
+        out.data.append(TAG_MOVE)
+        out.int(delta_x)
+        out.int(delta_y)
+        out.uint(decide_us)
+        out.uint(request_us)
+        out.uint(int(accepted))
+        self.stream.write(out.data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class TraceReader:
+    def __init__(self, data: bytes):
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError("Not a trace file")
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError("Unsupported trace version {}".format(data[len(MAGIC)]))
+        self.data = data
+        self.offset = len(MAGIC) + 1
+        self.strings: List[str] = []
+
+    @classmethod
+    def open(cls, path: str) -> "TraceReader":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def extend(self, data: bytes) -> None:
+        """
+        Append records written after the data already read, for traces that
+        arrive in pieces; iterating again yields only the new records
+        """
+        self.data = self.data[self.offset :] + data
+        self.offset = 0
+
+    def _uint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            byte = self.data[self.offset]
+            self.offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def _int(self) -> int:
+        return _unzigzag(self._uint())
+
+    def _string(self) -> str:
+        return self.strings[self._uint()]
+
+    def _object(self) -> GameObject:
+        obj_id = self._int()
+        type_name = self._string()
+        position = Position(x=self._uint(), y=self._uint())
+        mask = self._uint()
+        if not mask:
+            return GameObject(id=obj_id, position=position, type=type_name)
+        values = {}
+        for name in _INT_FIELDS:
+            if mask & (1 << (_PROPERTY_FIELDS.index(name) + 1)):
+                values[name] = self._int()
+        for name in _STR_FIELDS:
+            if mask & (1 << (_PROPERTY_FIELDS.index(name) + 1)):
+                values[name] = self._string()
+        if mask & (1 << (_PROPERTY_FIELDS.index("can_tackle") + 1)):
+            values["can_tackle"] = bool(self._uint())
+        if mask & (1 << (_PROPERTY_FIELDS.index("base") + 1)):
+            values["base"] = Base(x=self._uint(), y=self._uint())
+        return GameObject(
+            id=obj_id,
+            position=position,
+            type=type_name,
+            properties=Properties(**values),
+        )
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        features_cache: Dict[str, List[Feature]] = {}
+        while self.offset < len(self.data):
+            tag = self.data[self.offset]
+            self.offset += 1
+            if tag == TAG_SESSION:
+                self.strings = []
+            elif tag == TAG_STRING:
+                length = self._uint()
+                self.strings.append(
+                    self.data[self.offset : self.offset + length].decode()
+                )
+                self.offset += length
+            elif tag == TAG_BOT:
+                yield TraceBot(name=self._string(), id=self._string())
+            elif tag == TAG_BOARD:
+                time_ms = self._uint()
+                board_id, width, height, delay = (
+                    self._uint(),
+                    self._uint(),
+                    self._uint(),
+                    self._uint(),
+                )
+                features_json = self._string()
+                if features_json not in features_cache:
+                    features_cache[features_json] = [
+                        from_dict(Feature, f) for f in json.loads(features_json)
+                    ]
+                count = self._uint()
+                game_objects = (
+                    [self._object() for _ in range(count - 1)] if count else None
+                )
+                yield TraceBoard(
+                    time_ms=time_ms,
+                    board=Board(
+                        id=board_id,
+                        width=width,
+                        height=height,
+                        features=features_cache[features_json],
+                        minimum_delay_between_moves=delay,
+                        game_objects=game_objects,
+                    ),
+                )
+            elif tag == TAG_MOVE:
+                yield TraceMove(
+                    delta_x=self._int(),
+                    delta_y=self._int(),
+                    decide_us=self._uint(),
+                    request_us=self._uint(),
+                    accepted=bool(self._uint()),
+                )
+            else:
+                raise ValueError(
+                    "Unknown record tag {} at offset {}".format(tag, self.offset - 1)
+                )
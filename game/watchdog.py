@@ -0,0 +1,81 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from time import perf_counter
+from typing import Optional, Tuple
+
+from game.logic.base import BaseLogic, fallback_step
+from game.models import Board, GameObject, Position
+
+
+class MoveWatchdog:
+    """
+    Runs a controller's next_move against a per-tick compute budget. The call
+    runs on a worker thread; when the budget runs out a greedy step towards
+    the controller's fallback_target is used instead and the late call is left
+    to notice should_stop() and return.
+
+    The controller is only touched from one thread at a time: its fallback
+    target is read before each call is started, and while a late call is still
+    running later ticks wait for it at most their own budget and fall back
+    again, without calling into the controller.
+    """
+
+    def __init__(self, logic: BaseLogic, budget: float):
+        self.logic = logic
+        self.budget = budget
+        self.calls = 0
+        self.missed = 0
+        # Ticks that fell back because the previous call was still running
+        self.blocked = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._late: Optional[Future] = None
+        self._target: Optional[Position] = None
+
+    @property
+    def busy(self) -> bool:
+        """
+        True while an over-budget call is still running on the controller
+        """
+        if self._late is not None and self._late.done():
+            self._late = None
+        return self._late is not None
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        self.calls += 1
+        deadline = perf_counter() + self.budget
+        if self._late is not None:
+            try:
+                self._late.result(timeout=self.budget)
+            except FutureTimeout:
+                self.missed += 1
+                self.blocked += 1
+                return fallback_step(board_bot, board, self._target)
+            except Exception:
+                pass
+            self._late = None
+
+        # Nothing runs on the controller now, so its state can be read
+        self._target = self.logic.fallback_target(board_bot, board)
+        self.logic.deadline = deadline
+        future = self._executor.submit(self.logic.next_move, board_bot, board)
+        try:
+            return future.result(timeout=max(0.0, deadline - perf_counter()))
+        except FutureTimeout:
+            self.missed += 1
+            self._late = future
+            return fallback_step(board_bot, board, self._target)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def summary(self) -> str:
+        return (
+            "deadline: {} of {} moves missed the {:.0f} ms budget ({:.1%}), "
+            "{} while a late call was still running".format(
+                self.missed,
+                self.calls,
+                self.budget * 1000,
+                self.missed / self.calls if self.calls else 0,
+                self.blocked,
+            )
+        )
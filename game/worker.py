@@ -0,0 +1,178 @@
+"""
+Runs a logic controller in a persistent worker process, so CPU-heavy
+decisions never hold the GIL of the process doing the network I/O.
+
+Boards travel as trace records (see game.trace): strings are sent once and
+referenced by index afterwards. The worker is started with `python -m
+game.worker <logic>` rather than multiprocessing, since main.py is a script
+that a spawned child would run again.
+"""
+
+import os
+import pickle
+import queue
+import struct
+import subprocess
+import sys
+import threading
+from io import BytesIO
+from time import perf_counter
+from typing import BinaryIO, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, Bot, GameObject, Position
+from game.trace import TraceBoard, TraceBot, TraceReader, TraceWriter
+
+_FRAME = struct.Struct("<I")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _write_frame(stream: BinaryIO, payload: bytes) -> None:
+    stream.write(_FRAME.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def _read_frame(stream: BinaryIO) -> Optional[bytes]:
+    header = stream.read(_FRAME.size)
+    if len(header) < _FRAME.size:
+        return None
+    return stream.read(_FRAME.unpack(header)[0])
+
+
+def _pump(stream: BinaryIO, frames: queue.SimpleQueue) -> None:
+    # Blocking reads on a thread, so both sides can wait with a timeout on
+    # every platform; None marks the end of the stream
+    while True:
+        frame = _read_frame(stream)
+        frames.put(frame)
+        if frame is None:
+            return
+
+
+class ProcessLogic(BaseLogic):
+    """
+    Proxy for a controller running in a worker process. next_move waits for
+    the answer until the deadline, if one is set, and otherwise falls back;
+    answers to boards that were already superseded are dropped.
+    """
+
+    def __init__(self, logic: str):
+        self.logic = logic
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "game.worker", logic],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=_ROOT,
+        )
+        self.sequence = 0
+        self.late_replies = 0
+        self._stream = BytesIO()
+        self._writer = TraceWriter(self._stream)
+        self._bot_name: Optional[str] = None
+        self._fallback: Optional[Tuple[int, int]] = None
+        self._replies = queue.SimpleQueue()
+        threading.Thread(
+            target=_pump, args=(self.process.stdout, self._replies), daemon=True
+        ).start()
+
+    def _send_board(self, board_bot: GameObject, board: Board) -> None:
+        name = board_bot.properties.name
+        if name != self._bot_name:
+            self._writer.write_bot(name, "")
+            self._bot_name = name
+        self._writer.write_board(board, 0)
+        records = self._stream.getvalue()
+        self._stream.seek(0)
+        self._stream.truncate()
+        self.sequence += 1
+        _write_frame(self.process.stdin, pickle.dumps((self.sequence, records)))
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        self._send_board(board_bot, board)
+        while True:
+            timeout = None
+            if self.deadline is not None:
+                timeout = max(0.0, self.deadline - perf_counter())
+            try:
+                frame = self._replies.get(timeout=timeout)
+            except queue.Empty:
+                return self.fallback_move(board_bot, board)
+            if frame is None:
+                raise RuntimeError("{} worker exited".format(self.logic))
+            sequence, move, fallback, error = pickle.loads(frame)
+            if error:
+                raise RuntimeError("{} worker: {}".format(self.logic, error))
+            self._fallback = fallback
+            if sequence == self.sequence:
+                return move
+            self.late_replies += 1
+
+    def snapshot(self) -> BaseLogic:
+        # The controller's state lives in the worker process
+        raise NotImplementedError("ProcessLogic can't be snapshotted")
+
+    def fallback_target(
+        self, board_bot: GameObject, board: Board
+    ) -> Optional[Position]:
+        if self._fallback is not None:
+            return Position(x=self._fallback[0], y=self._fallback[1])
+        return super().fallback_target(board_bot, board)
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def serve(logic: str) -> None:
+    """
+    Worker side: decide on the newest board received, skipping boards that
+    were superseded while the previous decision was being computed
+    """
+    from game.controllers import CONTROLLERS
+
+    # Keep stdout for replies only; anything the controller prints goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    controller = CONTROLLERS[logic]()
+    frames = queue.SimpleQueue()
+    threading.Thread(target=_pump, args=(sys.stdin.buffer, frames), daemon=True).start()
+    reader: Optional[TraceReader] = None
+    bot: Optional[Bot] = None
+    board: Optional[Board] = None
+
+    while True:
+        batch = [frames.get()]
+        while not frames.empty():
+            batch.append(frames.get())
+        for frame in batch:
+            if frame is None:
+                return
+            sequence, records = pickle.loads(frame)
+            if reader is None:
+                reader = TraceReader(records)
+            else:
+                reader.extend(records)
+            for record in reader:
+                if isinstance(record, TraceBot):
+                    bot = Bot(name=record.name, email="", id=record.id)
+                elif isinstance(record, TraceBoard):
+                    board = record.board
+
+        move, fallback, error = (0, 0), None, None
+        try:
+            board_bot = board.get_bot(bot)
+            move = controller.next_move(board_bot, board)
+            target = controller.fallback_target(board_bot, board)
+            if target is not None:
+                fallback = (target.x, target.y)
+        except Exception as e:
+            error = repr(e)
+        _write_frame(replies, pickle.dumps((sequence, move, fallback, error)))
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
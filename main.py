@@ -1,24 +1,27 @@
 import argparse
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, perf_counter, sleep
 
 from colorama import Back, Fore, Style, init
-from game.api import Api
+from game.api import Api, DEFAULT_POOL_SIZE
 from game.board_handler import BoardHandler
 from game.bot_handler import BotHandler
-from game.logic.crawler import Crawler
-from game.logic.nazarick import NazarickNPC
-from game.logic.random import RandomLogic
+from game.controllers import CONTROLLERS
+from game.log import DEFAULT_LEVEL, get_logger, parse_sampling, setup_logging
+from game.request_policy import DEFAULT_READ_TIMEOUT, default_policy
+from game.speculation import SpeculationStats, board_signature, predict_board
+from game.timing import TIMINGS, MovePacer
+from game.trace import TraceWriter
+from game.watchdog import MoveWatchdog
+from game.worker import ProcessLogic
 from game.util import *
 from game.logic.base import BaseLogic
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": RandomLogic,
-    "Crawler": Crawler,
-    "Nazarick": NazarickNPC,
-}
+DEFAULT_BUDGET_SHARE = 0.8
+MAX_FAILED_REQUESTS = 10
 
 ###############################################################################
 #
@@ -58,10 +61,88 @@ group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--pool-size",
+    action="store",
+    default=DEFAULT_POOL_SIZE,
+    help="Number of keep-alive connections kept open to the server. Default: {}".format(
+        DEFAULT_POOL_SIZE
+    ),
+)
+group.add_argument(
+    "--compact-boards",
+    action="store_true",
+    help="Keep board objects in packed arrays instead of one dataclass per object",
+)
+group.add_argument(
+    "--incremental-boards",
+    action="store_true",
+    help="Rebuild only the board objects that changed since the previous tick",
+)
+group.add_argument(
+    "--request-timeout",
+    action="store",
+    default=DEFAULT_READ_TIMEOUT,
+    help="Seconds to wait for a response before retrying or giving up. Default: {}".format(
+        DEFAULT_READ_TIMEOUT
+    ),
+)
+group.add_argument(
+    "--hedge-after",
+    action="store",
+    help="Send a second board request when the first has not answered after this many milliseconds",
+)
+parser.add_argument(
+    "--move-budget",
+    help="Milliseconds next_move may take before a fallback move is sent, 0 to disable. Default: {:.0%} of the board's move delay".format(
+        DEFAULT_BUDGET_SHARE
+    ),
+    action="store",
+)
+parser.add_argument(
+    "--worker-process",
+    action="store_true",
+    help="Run the logic controller in a separate process, fed compact boards",
+)
+parser.add_argument(
+    "--speculate",
+    action="store_true",
+    help="Decide the following move on a predicted board while each move request is in flight",
+)
+parser.add_argument(
+    "--log-level",
+    default=DEFAULT_LEVEL,
+    help="DEBUG, INFO, WARNING or ERROR. Default: {}".format(DEFAULT_LEVEL),
+)
+parser.add_argument(
+    "--log-sample",
+    help="Keep one record in every N per log category, e.g. http=10,moves=100",
+)
+parser.add_argument(
+    "--record",
+    help="Append every board received, move made and their timings to this trace file",
+    action="store",
+)
 args = parser.parse_args()
+if args.speculate and args.worker_process:
+    # Speculative moves are decided on a copy of the controller, and the
+    # controller of a worker process can't be copied
+    parser.error("--speculate can't be combined with --worker-process")
+setup_logging(args.log_level, parse_sampling(args.log_sample))
+moves_log = get_logger("moves")
+http_log = get_logger("http")
 
-time_factor = int(args.time_factor)
-api = Api(args.host)
+time_factor = float(args.time_factor)
+api = Api(
+    args.host,
+    pool_size=int(args.pool_size),
+    compact_boards=args.compact_boards,
+    incremental_boards=args.incremental_boards,
+    policy=default_policy(
+        float(args.request_timeout),
+        float(args.hedge_after) / 1000 if args.hedge_after else None,
+    ),
+)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
@@ -117,7 +198,12 @@ print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
 
 # Setup variables
 logic_class = CONTROLLERS[logic_controller]
-bot_logic: BaseLogic = logic_class()
+if args.worker_process:
+    # Decisions are computed in a separate process; this one keeps the
+    # requests, pacing and fallback moves going meanwhile
+    bot_logic: BaseLogic = ProcessLogic(logic_controller)
+else:
+    bot_logic: BaseLogic = logic_class()
 
 ###############################################################################
 #
@@ -162,8 +248,81 @@ if not current_board_id:
 # Prepare state from current board
 #
 ###############################################################################
+recorder = TraceWriter.open(args.record) if args.record else None
+if recorder:
+    recorder.write_bot(bot.name, bot.id)
+
+
+def record_board(board):
+    if recorder and board:
+        recorder.write_board(board, int(monotonic() * 1000))
+
+
 board = board_handler.get_board(current_board_id)
+record_board(board)
 move_delay = board.minimum_delay_between_moves / 1000
+pacer = MovePacer(move_delay, time_factor)
+
+# With --speculate the move request is sent from a worker thread while this
+# thread decides the next move on the board we expect back
+sender = ThreadPoolExecutor(max_workers=1) if args.speculate else None
+speculation = SpeculationStats()
+speculative = None
+
+# next_move gets a compute budget per tick; past it the controller's cheap
+# fallback move is sent instead
+if args.move_budget is None:
+    move_budget = pacer.interval * DEFAULT_BUDGET_SHARE
+else:
+    move_budget = float(args.move_budget) / 1000
+watchdog = MoveWatchdog(bot_logic, move_budget) if move_budget > 0 else None
+decide = watchdog.next_move if watchdog else bot_logic.next_move
+
+failed_requests = 0
+
+
+def speculate(predicted_bot, predicted):
+    """
+    Decide on a copy of the controller, so a predicted board that never
+    happens leaves no trace in the controller's state (such as its stuck
+    detection); returns (signature, move, copy), or None if deciding failed
+    """
+    speculator = bot_logic.snapshot()
+    speculator.deadline = perf_counter() + move_budget if move_budget > 0 else None
+    try:
+        move = speculator.next_move(predicted_bot, predicted)
+    except Exception as e:
+        moves_log.warning("Speculative next_move failed: %r", e)
+        speculation.skipped += 1
+        return None
+    signature = board_signature(
+        predicted,
+        predicted_bot,
+        bot_logic.speculation_radius,
+        bot_logic.speculation_clock(predicted_bot, predicted),
+    )
+    return signature, move, speculator
+
+
+def fetch_board():
+    """
+    Board of this tick; failed requests are retried every move slot until
+    MAX_FAILED_REQUESTS in a row, then None is returned
+    """
+    global failed_requests
+    while True:
+        try:
+            board = board_handler.get_board(current_board_id)
+        except Exception as e:
+            failed_requests += 1
+            http_log.warning("Board fetch failed (%d in a row): %r", failed_requests, e)
+            if failed_requests >= MAX_FAILED_REQUESTS:
+                return None
+            sleep(pacer.interval)
+            continue
+        failed_requests = 0
+        return board
+
 
 ###############################################################################
 #
@@ -177,27 +336,89 @@ while True:
         # Managed to get game over
         break
 
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
+    # Calculate next move, unless it was already decided on a board that
+    # turned out to match the real one
+    decide_us = 0
+    if speculative and speculative[0] == board_signature(
+        board,
+        board_bot,
+        bot_logic.speculation_radius,
+        bot_logic.speculation_clock(board_bot, board),
+    ):
+        speculation.hits += 1
+        delta_x, delta_y = speculative[1]
+        # The controller carries on from the state its copy decided in
+        bot_logic.restore(speculative[2])
+    else:
+        if speculative:
+            speculation.misses += 1
+        decide_start = perf_counter()
+        delta_x, delta_y = decide(board_bot, board)
+        decide_us = int((perf_counter() - decide_start) * 1e6)
+        TIMINGS.record("next_move", decide_us * 1000)
+    speculative = None
     # delta_x, delta_y = (1, 0)
     if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+        if recorder:
+            recorder.write_move(delta_x, delta_y, decide_us, 0, False)
+        moves_log.warning(
+            "Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+            delta_x,
+            delta_y,
+            board_bot.position.x,
+            board_bot.position.y,
         )
-        sleep(1)
+        # Wait one move slot before looking again instead of spinning
+        with TIMINGS.span("sleep"):
+            sleep(pacer.interval)
+        board = fetch_board()
+        if not board:
+            break
+        record_board(board)
         continue
 
+    # Don't spam the board more than it allows! The time spent deciding
+    # already counts towards the delay
+    with TIMINGS.span("sleep"):
+        pacer.wait()
+
     try:
         # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+        request_start = perf_counter()
+        pacer.sent()
+        if sender:
+            pending = sender.submit(
+                bot_handler.move, bot.id, current_board_id, delta_x, delta_y
+            )
+            predicted = predict_board(
+                board, board_bot, delta_x, delta_y, int(pacer.interval * 1000)
+            )
+            predicted_bot = predicted.get_bot(bot) if predicted else None
+            # A late call still running on the controller can't be copied
+            if predicted_bot and not (watchdog and watchdog.busy):
+                with TIMINGS.span("speculate"):
+                    speculative = speculate(predicted_bot, predicted)
+            else:
+                speculation.skipped += 1
+            board = pending.result()
+        else:
+            board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+        accepted = True
     except Exception as e:
-        break
+        # A timed out or failed move is not fatal, the board tells what happened
+        http_log.warning("Move failed: %r", e)
+        board = None
+        accepted = False
+    if recorder:
+        request_us = int((perf_counter() - request_start) * 1e6)
+        recorder.write_move(delta_x, delta_y, decide_us, request_us, accepted)
 
     if not board:
         # Read new board state
-        board = board_handler.get_board(current_board_id)
+        board = fetch_board()
+        if not board:
+            break
+    record_board(board)
 
     # Get new state
     board_bot = board.get_bot(bot)
@@ -205,10 +426,6 @@ while True:
         # Managed to get game over after move
         break
 
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
-
 
 ###############################################################################
 #
@@ -216,3 +433,21 @@ while True:
 #
 ###############################################################################
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+print(pacer.summary())
+if sender:
+    print(speculation.summary())
+    sender.shutdown()
+print(api.stats.summary())
+if watchdog:
+    print(watchdog.summary())
+    watchdog.close()
+print(
+    TIMINGS.summary(
+        ["http", "json", "decode", "model", "next_move", "speculate", "sleep"]
+    )
+)
+if args.worker_process:
+    bot_logic.close()
+if recorder:
+    recorder.close()
+api.close()
@@ -0,0 +1,96 @@
+import argparse
+import contextlib
+import os
+import random
+import statistics
+import time
+from typing import List, Optional
+
+from game.controllers import CONTROLLERS
+from game.models import Bot
+from game.trace import TraceBoard, TraceBot, TraceMove, TraceReader
+
+
+def _summary(label: str, samples: List[float]) -> str:
+    if not samples:
+        return "{:<18} -".format(label)
+    ordered = sorted(samples)
+    return "{:<18} mean {:9.1f} us  p50 {:9.1f} us  p99 {:9.1f} us".format(
+        label,
+        statistics.mean(samples),
+        ordered[len(ordered) // 2],
+        ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded game trace through a logic controller offline"
+    )
+    parser.add_argument("trace", help="Trace file written by main.py --record")
+    parser.add_argument(
+        "--logic",
+        required=True,
+        help="Valid options are: {}".format(", ".join(CONTROLLERS)),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show what the controller prints"
+    )
+    args = parser.parse_args()
+    if args.logic not in CONTROLLERS:
+        parser.error("Invalid logic controller: {}".format(args.logic))
+
+    random.seed(args.seed)
+    controller = CONTROLLERS[args.logic]()
+    bot: Optional[Bot] = None
+    pending = None
+    decisions = 0
+    agreed = 0
+    replay_us: List[float] = []
+    recorded_decide_us: List[float] = []
+    recorded_request_us: List[float] = []
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        output = (
+            contextlib.nullcontext()
+            if args.verbose
+            else contextlib.redirect_stdout(devnull)
+        )
+        with output:
+            for record in TraceReader.open(args.trace):
+                if isinstance(record, TraceBot):
+                    bot = Bot(name=record.name, email="", id=record.id)
+                    controller = CONTROLLERS[args.logic]()
+                elif isinstance(record, TraceBoard) and bot:
+                    board_bot = record.board.get_bot(bot)
+                    if not board_bot:
+                        continue
+                    decide_start = time.perf_counter()
+                    pending = controller.next_move(board_bot, record.board)
+                    replay_us.append((time.perf_counter() - decide_start) * 1e6)
+                elif isinstance(record, TraceMove):
+                    recorded_decide_us.append(record.decide_us)
+                    if record.accepted:
+                        recorded_request_us.append(record.request_us)
+                    if pending is not None:
+                        decisions += 1
+                        agreed += tuple(pending) == (record.delta_x, record.delta_y)
+                        pending = None
+    elapsed = time.perf_counter() - start
+
+    print(_summary("replayed decide", replay_us))
+    print(_summary("recorded decide", recorded_decide_us))
+    print(_summary("recorded request", recorded_request_us))
+    if decisions:
+        print(
+            "{} of {} moves match the recording ({:.1%})".format(
+                agreed, decisions, agreed / decisions
+            )
+        )
+    print("{} boards replayed in {:.2f}s".format(len(replay_us), elapsed))
+
+
+if __name__ == "__main__":
+    main()
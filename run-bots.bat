@@ -1,5 +1,3 @@
 @echo off
-start cmd /c "python main.py --logic Nazarick --email=test@email.com --name=stima --password=123456 --team etimo"
-start cmd /c "python main.py --logic Random --email=test1@email.com --name=stima1 --password=123456 --team etimo"
-start cmd /c "python main.py --logic Random --email=test2@email.com --name=stima2 --password=123456 --team etimo"
-start cmd /c "python main.py --logic Random --email=test3@email.com --name=stima3 --password=123456 --team etimo"
+rem Runs every bot listed in bots.json in a single process.
+python fleet.py --manifest bots.json
@@ -0,0 +1,84 @@
+import argparse
+import contextlib
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from game.controllers import CONTROLLERS
+from game.simulator import SimulatorConfig, play_game
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Play Diamonds games offline between logic controllers"
+    )
+    parser.add_argument(
+        "--logic",
+        nargs="+",
+        default=["Nazarick", "Crawler", "Random", "Random"],
+        help="One controller per bot. Valid options are: {}".format(
+            ", ".join(CONTROLLERS)
+        ),
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=15)
+    parser.add_argument("--height", type=int, default=15)
+    parser.add_argument(
+        "--ms-per-move",
+        type=int,
+        default=None,
+        help="Game time each move takes. Default: the board's minimum move delay",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show what the controllers print"
+    )
+    args = parser.parse_args()
+
+    for logic in args.logic:
+        if logic not in CONTROLLERS:
+            parser.error("Invalid logic controller: {}".format(logic))
+
+    config = SimulatorConfig(
+        width=args.width, height=args.height, ms_per_move=args.ms_per_move
+    )
+    names = ["{}-{}".format(logic, i) for i, logic in enumerate(args.logic)]
+    scores: Dict[str, List[int]] = {name: [] for name in names}
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        output = (
+            contextlib.nullcontext()
+            if args.verbose
+            else contextlib.redirect_stdout(devnull)
+        )
+        with output:
+            for game in range(args.games):
+                controllers = [
+                    (name, CONTROLLERS[logic]())
+                    for name, logic in zip(names, args.logic)
+                ]
+                result = play_game(controllers, config, seed=args.seed + game)
+                for name in names:
+                    scores[name].append(result[name])
+    elapsed = time.perf_counter() - start
+
+    for name in names:
+        print(
+            "{:<14} mean {:6.2f}  stdev {:6.2f}  max {:3d}".format(
+                name,
+                statistics.mean(scores[name]),
+                statistics.pstdev(scores[name]),
+                max(scores[name]),
+            )
+        )
+    print(
+        "{} games in {:.2f}s ({:.1f} ms/game)".format(
+            args.games, elapsed, elapsed / args.games * 1000
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import pytest
+
+from decode import decode
+from game.models import Board, SchemaError, from_dict
+
+BOARD = {
+    "id": 1,
+    "width": 15,
+    "height": 15,
+    "features": [],
+    "minimumDelayBetweenMoves": 100,
+}
+
+
+def test_board_without_game_objects_decodes_to_none():
+    board = from_dict(Board, decode(BOARD))
+
+    assert board.game_objects is None
+    assert board.bots == []
+    assert board.diamonds == []
+
+
+def test_missing_required_field_is_a_schema_error():
+    payload = dict(BOARD)
+    del payload["width"]
+
+    with pytest.raises(SchemaError) as e:
+        from_dict(Board, decode(payload))
+    assert e.value.path == "width"
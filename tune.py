@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from game.controllers import CONTROLLERS
+from game.logic.NazarickSublogic.nazarick_config import BotConfig
+from game.logic.nazarick import NazarickNPC
+from game.simulator import SimulatorConfig, play_game
+
+TUNED = "Tuned"
+DEFAULT_OPPONENTS = ["Crawler", "Random", "Random"]
+DEFAULT_CHECKPOINT = "tune-checkpoint.json"
+DEFAULT_OUTPUT = "tuned-weights.json"
+# Games per worker task; small enough to keep every core busy in late rounds
+GAMES_PER_TASK = 4
+
+
+def sample_weights(
+    rng: random.Random, base: Dict[str, float], sigma: float
+) -> Dict[str, float]:
+    """
+    Log-normal perturbation of every weight, keeping its sign
+    """
+    return {
+        key: round(value * math.exp(rng.gauss(0, sigma)), 4)
+        for key, value in base.items()
+    }
+
+
+def play_games(
+    weights: Dict[str, float],
+    opponents: List[str],
+    seeds: List[int],
+    config: SimulatorConfig,
+) -> List[int]:
+    """
+    Worker task: the tuned Nazarick's score in one game per seed
+    """
+    scores = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for seed in seeds:
+            controllers = [(TUNED, NazarickNPC(weights))] + [
+                ("{}-{}".format(logic, i), CONTROLLERS[logic]())
+                for i, logic in enumerate(opponents)
+            ]
+            scores.append(play_game(controllers, config, seed)[TUNED])
+    return scores
+
+
+class Tuner:
+    """
+    Successive halving over randomly sampled weight sets. Every candidate
+    still in the race plays the same seeds (common random numbers), then the
+    best 1/eta survive and the game budget per candidate grows by eta.
+    """
+
+    def __init__(
+        self,
+        candidates: List[Dict],
+        opponents: List[str],
+        config: SimulatorConfig,
+        games: int,
+        eta: int,
+        seed: int,
+        workers: Optional[int],
+    ):
+        self.candidates = candidates
+        self.opponents = opponents
+        self.config = config
+        self.games = games
+        self.eta = eta
+        self.seed = seed
+        self.workers = workers
+        self.round = 0
+
+    @classmethod
+    def fresh(cls, size: int, sigma: float, seed: int, **kwargs) -> "Tuner":
+        rng = random.Random(seed)
+        # The current weights always take part, so the result is never worse
+        # than them on the games played
+        weights = [dict(BotConfig.WEIGHTS)] + [
+            sample_weights(rng, BotConfig.WEIGHTS, sigma) for _ in range(size - 1)
+        ]
+        candidates = [{"weights": w, "scores": [], "alive": True} for w in weights]
+        return cls(candidates, seed=seed, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "Tuner":
+        with open(path, "r") as f:
+            state = json.load(f)
+        tuner = cls(state["candidates"], seed=state["seed"], **kwargs)
+        tuner.round = state["round"]
+        return tuner
+
+    def save(self, path: str) -> None:
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(
+                {"round": self.round, "seed": self.seed, "candidates": self.candidates},
+                f,
+                indent=1,
+            )
+        os.replace(temporary, path)
+
+    @property
+    def alive(self) -> List[Dict]:
+        return [c for c in self.candidates if c["alive"]]
+
+    @property
+    def done(self) -> bool:
+        return len(self.alive) <= 1
+
+    def run_round(self, pool: ProcessPoolExecutor) -> None:
+        budget = self.games * self.eta**self.round
+        tasks: List[Tuple[Dict, object]] = []
+        for candidate in self.alive:
+            # Seeds carry over between rounds, only the missing games are played
+            seeds = [self.seed + i for i in range(len(candidate["scores"]), budget)]
+            for start in range(0, len(seeds), GAMES_PER_TASK):
+                chunk = seeds[start : start + GAMES_PER_TASK]
+                future = pool.submit(
+                    play_games,
+                    candidate["weights"],
+                    self.opponents,
+                    chunk,
+                    self.config,
+                )
+                tasks.append((candidate, future))
+        for candidate, future in tasks:
+            candidate["scores"].extend(future.result())
+
+        ranked = sorted(
+            self.alive, key=lambda c: statistics.mean(c["scores"]), reverse=True
+        )
+        for candidate in ranked[max(1, len(ranked) // self.eta) :]:
+            candidate["alive"] = False
+        self.round += 1
+
+    def best(self) -> Dict:
+        return max(
+            self.alive or self.candidates,
+            key=lambda c: statistics.mean(c["scores"]) if c["scores"] else -1,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Tune Nazarick's BotConfig.WEIGHTS with offline games in parallel"
+    )
+    parser.add_argument(
+        "--opponents",
+        nargs="*",
+        default=DEFAULT_OPPONENTS,
+        help="Controllers playing against the tuned bot. Valid options are: {}".format(
+            ", ".join(CONTROLLERS)
+        ),
+    )
+    parser.add_argument(
+        "--candidates", type=int, default=32, help="Weight sets sampled"
+    )
+    parser.add_argument(
+        "--games", type=int, default=8, help="Games per candidate in the first round"
+    )
+    parser.add_argument(
+        "--eta", type=int, default=2, help="Keep 1/eta per round, eta times the games"
+    )
+    parser.add_argument(
+        "--sigma", type=float, default=0.5, help="Spread of the log-normal sampling"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=15)
+    parser.add_argument("--height", type=int, default=15)
+    parser.add_argument(
+        "--ms-per-move",
+        type=int,
+        default=None,
+        help="Game time each move takes. Default: the board's minimum move delay",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Default: one per CPU core"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=DEFAULT_CHECKPOINT,
+        help="Saved after every round and resumed from when present. Default: {}".format(
+            DEFAULT_CHECKPOINT
+        ),
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help="Where the best WEIGHTS are written. Default: {}".format(DEFAULT_OUTPUT),
+    )
+    args = parser.parse_args()
+
+    for logic in args.opponents:
+        if logic not in CONTROLLERS:
+            parser.error("Invalid logic controller: {}".format(logic))
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    settings = dict(
+        opponents=args.opponents,
+        config=SimulatorConfig(
+            width=args.width, height=args.height, ms_per_move=args.ms_per_move
+        ),
+        games=args.games,
+        eta=args.eta,
+        workers=args.workers,
+    )
+    if os.path.exists(args.checkpoint):
+        tuner = Tuner.load(args.checkpoint, **settings)
+        print("Resuming from {} at round {}".format(args.checkpoint, tuner.round))
+    else:
+        tuner = Tuner.fresh(args.candidates, args.sigma, args.seed, **settings)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        while not tuner.done:
+            round_start = time.perf_counter()
+            tuner.run_round(pool)
+            tuner.save(args.checkpoint)
+            best = tuner.best()
+            print(
+                "round {}: {} left, best mean {:.2f} over {} games ({:.1f}s)".format(
+                    tuner.round,
+                    len(tuner.alive),
+                    statistics.mean(best["scores"]),
+                    len(best["scores"]),
+                    time.perf_counter() - round_start,
+                )
+            )
+
+    best = tuner.best()
+    baseline = tuner.candidates[0]
+    with open(args.output, "w") as f:
+        json.dump(best["weights"], f, indent=4)
+    print(
+        "Best mean {:.2f} vs current WEIGHTS {:.2f} (over {} and {} games) in {:.1f}s".format(
+            statistics.mean(best["scores"]),
+            statistics.mean(baseline["scores"]),
+            len(best["scores"]),
+            len(baseline["scores"]),
+            time.perf_counter() - start,
+        )
+    )
+    print("Wrote {}; to adopt them, paste into BotConfig:".format(args.output))
+    print(
+        "    WEIGHTS = {}".format(json.dumps(best["weights"], indent=8)[:-1] + "    }")
+    )
+
+
+if __name__ == "__main__":
+    main()